@@ -1,117 +1,167 @@
+import html
 import logging
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ForceReply
+import sqlite3
+import time
+import asyncio
+from collections import OrderedDict
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ForceReply, ReactionTypeEmoji
 from telegram.ext import ContextTypes
+from telegram.error import TelegramError
 from database import Database
 from config import Config
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+_MENU_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("👥 View Active Users", callback_data="adminchat_users")],
+    [InlineKeyboardButton("💬 Chat with User", callback_data="adminchat_start")],
+    [InlineKeyboardButton("📋 Chat History", callback_data="adminchat_history")],
+    [InlineKeyboardButton("❌ End All Chats", callback_data="adminchat_end_all")]
+])
+
+_MENU_TEMPLATE = (
+    "🔐 **Hidden Admin Chat System**\n\n"
+    "**Status:**\n"
+    "• Active Chats: {active}\n"
+    "• Online Admins: {admins}\n"
+    "• Total Users: {total}\n\n"
+    "{features}"
+    "**Select an option:**"
+)
+
+_MENU_FEATURES = (
+    "**Features:**\n"
+    "• Chat anonymously with users\n"
+    "• Help users without revealing admin identity\n"
+    "• Monitor user conversations\n"
+    "• Provide instant support\n\n"
+)
+
+def _preview(text: str, length: int) -> str:
+    """Cut text to length characters, marking the cut with an ellipsis"""
+    return text[:length] + "..." if len(text) > length else text
+
 class AdminChatSystem:
     """Hidden admin chat system for customer support"""
     
+    STATS_CACHE_SECONDS = 30
+    RECENT_MESSAGES_CACHE_SECONDS = 5
+    RECENT_MESSAGES_FETCH_LIMIT = 100
+    ACTIVE_USERS_PAGE_SIZE = 10
+    
+    # Telegram allows ~30 messages/second across all chats
+    NOTIFY_BATCH_SIZE = 25
+    NOTIFY_BATCH_DELAY = 1
+    
+    # Sessions with no messages either way for this long are closed
+    SESSION_IDLE_TIMEOUT = 30 * 60  # seconds
+    SESSION_GC_INTERVAL = 300  # seconds
+    
+    # Minimum gap between delivery confirmations to the same admin
+    CONFIRM_DEBOUNCE_SECONDS = 2.0
+    
     def __init__(self, database: Database):
         self.db = database
-        self.active_chats = {}  # {user_id: {'admin_id': admin_id, 'started_at': datetime}}
+        # {user_id: {'admin_id', 'started_at', 'started_at_str', 'last_activity'}},
+        # least recently active first; last_activity is a time.monotonic() reading
+        self.active_chats = OrderedDict()
+        self._admin_to_user = {}  # {admin_id: user_id}, reverse index of active_chats
+        self._stats_cache = None  # (stats, fetched_at monotonic)
+        self._recent_cache = {'ts': 0.0, 'limit': 0, 'rows': []}
+        self._last_confirm = {}  # {admin_id: monotonic time of last confirmation}
+        
+        # Callback routing: exact callback_data first, then id-bearing prefixes
+        self._cb_handlers = {
+            "adminchat_users": self._show_active_users,
+            "adminchat_start": self._start_chat_with_user,
+            "adminchat_history": self._show_chat_history,
+            "adminchat_end_all": self._end_all_chats,
+            "adminchat_back": self._show_admin_chat_menu,
+        }
+        self._cb_prefix = {
+            "adminchat_connect_": self._connect_to_user,
+            "adminchat_users_p": self._show_active_users,
+            "adminchat_end_": self._end_chat_with_user,
+        }
     
     async def start_admin_chat(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Start hidden admin chat session"""
         user = update.effective_user
         
-        if user.id not in Config.ADMIN_IDS:
+        if user.id not in Config.ADMIN_ID_SET:
             await update.message.reply_text("❌ You are not authorized to use admin chat.")
             return
         
-        keyboard = [
-            [InlineKeyboardButton("👥 View Active Users", callback_data="adminchat_users")],
-            [InlineKeyboardButton("💬 Chat with User", callback_data="adminchat_start")],
-            [InlineKeyboardButton("📋 Chat History", callback_data="adminchat_history")],
-            [InlineKeyboardButton("❌ End All Chats", callback_data="adminchat_end_all")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        active_count = len(self.active_chats)
-        chat_text = (
-            f"🔐 **Hidden Admin Chat System**\n\n"
-            f"**Status:**\n"
-            f"• Active Chats: {active_count}\n"
-            f"• Online Admins: {len(Config.ADMIN_IDS)}\n"
-            f"• Total Users: {self._get_total_users()}\n\n"
-            f"**Features:**\n"
-            f"• Chat anonymously with users\n"
-            f"• Help users without revealing admin identity\n"
-            f"• Monitor user conversations\n"
-            f"• Provide instant support\n\n"
-            f"**Select an option:**"
-        )
-        
-        await update.message.reply_text(
-            chat_text,
-            reply_markup=reply_markup,
-            parse_mode='Markdown'
-        )
+        await self._render_menu(update.message.reply_text, show_features=True)
     
     async def handle_admin_chat_callback(self, query, context):
         """Handle admin chat callbacks"""
         data = query.data
         user = query.from_user
         
-        if user.id not in Config.ADMIN_IDS:
+        if user.id not in Config.ADMIN_ID_SET:
             await query.answer("❌ Not authorized", show_alert=True)
             return
         
         try:
-            if data == "adminchat_users":
-                await self._show_active_users(query, context)
-            elif data == "adminchat_start":
-                await self._start_chat_with_user(query, context)
-            elif data == "adminchat_history":
-                await self._show_chat_history(query, context)
-            elif data == "adminchat_end_all":
-                await self._end_all_chats(query, context)
-            elif data.startswith("adminchat_connect_"):
-                user_id = int(data.split("_")[2])
-                await self._connect_to_user(query, context, user_id)
-            elif data.startswith("adminchat_end_"):
-                user_id = int(data.split("_")[2])
-                await self._end_chat_with_user(query, context, user_id)
-            elif data == "adminchat_back":
-                await self._show_admin_chat_menu(query, context)
-        except Exception as e:
-            logger.error(f"Error in admin chat callback: {e}")
+            handler = self._cb_handlers.get(data)
+            if handler is not None:
+                await handler(query, context)
+                return
+            
+            for prefix, prefix_handler in self._cb_prefix.items():
+                if data.startswith(prefix):
+                    await prefix_handler(query, context, int(data[len(prefix):]))
+                    return
+        except Exception:
+            logger.exception("Error in admin chat callback")
             await query.edit_message_text("❌ An error occurred in admin chat system.")
     
-    async def _show_active_users(self, query, context):
-        """Show list of active users for chat"""
-        # Get recent users from database
-        recent_users = self.db.get_recent_user_messages(limit=20)
+    async def _show_active_users(self, query, context, page: int = 0):
+        """Show one page of active users for chat"""
+        page_size = self.ACTIVE_USERS_PAGE_SIZE
+        offset = page * page_size
+        
+        # Fetch one extra row to learn whether a next page exists
+        recent_users = await self._get_recent(page_size + 1, offset=offset)
+        has_next = len(recent_users) > page_size
         
+        # One pass builds both the text and the keyboard rows
+        text_parts = ["👥 <b>Active Users</b>\n\n"]
         keyboard = []
-        user_text = "👥 **Active Users**\n\n"
-        
-        if recent_users:
-            for i, user_msg in enumerate(recent_users[:10]):
-                user_id = user_msg['user_id']
-                username = user_msg['username'] or f"User_{user_id}"
-                last_msg = user_msg['message_text'][:30] + "..." if len(user_msg['message_text']) > 30 else user_msg['message_text']
-                
-                user_text += f"{i+1}. @{username} (ID: {user_id})\n"
-                user_text += f"   Last: {last_msg}\n\n"
-                
-                keyboard.append([InlineKeyboardButton(
-                    f"💬 Chat with @{username}",
-                    callback_data=f"adminchat_connect_{user_id}"
-                )])
-        else:
-            user_text += "No recent user activity found."
+        append_text = text_parts.append
+        append_button = keyboard.append
+        
+        for i, user_msg in enumerate(recent_users[:page_size], offset + 1):
+            user_id = user_msg['user_id']
+            username = user_msg['username'] or f"User_{user_id}"
+            last_msg = html.escape(_preview(user_msg['message_text'], 30))
+            
+            append_text(f"{i}. @{html.escape(username)} (ID: {user_id})\n   Last: {last_msg}\n\n")
+            append_button([InlineKeyboardButton(
+                f"💬 Chat with @{username}",
+                callback_data=f"adminchat_connect_{user_id}"
+            )])
+        
+        if not keyboard:
+            append_text("No recent user activity found.")
+        
+        nav_row = []
+        if page > 0:
+            nav_row.append(InlineKeyboardButton("⬅️ Prev", callback_data=f"adminchat_users_p{page - 1}"))
+        if has_next:
+            nav_row.append(InlineKeyboardButton("➡️ Next", callback_data=f"adminchat_users_p{page + 1}"))
+        if nav_row:
+            keyboard.append(nav_row)
         
         keyboard.append([InlineKeyboardButton("🔙 Back", callback_data="adminchat_back")])
         reply_markup = InlineKeyboardMarkup(keyboard)
         
         await query.edit_message_text(
-            user_text,
+            "".join(text_parts),
             reply_markup=reply_markup,
-            parse_mode='Markdown'
+            parse_mode='HTML'
         )
     
     async def _start_chat_with_user(self, query, context):
@@ -129,11 +179,24 @@ class AdminChatSystem:
         """Connect admin to specific user"""
         admin_id = query.from_user.id
         
+        # One admin talks to one user: drop any session either side was already in
+        previous_user_id = self._admin_to_user.pop(admin_id, None)
+        if previous_user_id is not None:
+            self.active_chats.pop(previous_user_id, None)
+        previous_chat = self.active_chats.get(user_id)
+        if previous_chat is not None:
+            self._admin_to_user.pop(previous_chat['admin_id'], None)
+        
         # Start chat session
+        self._admin_to_user[admin_id] = user_id
+        started_at = datetime.now()
         self.active_chats[user_id] = {
             'admin_id': admin_id,
-            'started_at': datetime.now()
+            'started_at': started_at,
+            'started_at_str': started_at.strftime('%H:%M:%S'),
+            'last_activity': time.monotonic()
         }
+        self.active_chats.move_to_end(user_id)
         
         # Notify admin
         await query.edit_message_text(
@@ -163,17 +226,18 @@ class AdminChatSystem:
     async def _show_chat_history(self, query, context):
         """Show recent chat history"""
         # Get recent messages
-        messages = self.db.get_recent_user_messages(limit=50)
+        messages = await self._get_recent(50)
         
-        history_text = "📋 **Recent Chat History**\n\n"
+        text_parts = ["📋 <b>Recent Chat History</b>\n\n"]
         
         if messages:
             for msg in messages[:20]:
                 username = msg['username'] or f"User_{msg['user_id']}"
-                msg_text = msg['message_text'][:50] + "..." if len(msg['message_text']) > 50 else msg['message_text']
-                history_text += f"👤 @{username}: {msg_text}\n"
+                msg_text = html.escape(_preview(msg['message_text'], 50))
+                text_parts.append(f"👤 @{html.escape(username)}: {msg_text}\n")
         else:
-            history_text += "No chat history found."
+            text_parts.append("No chat history found.")
+        history_text = "".join(text_parts)
         
         keyboard = [[InlineKeyboardButton("🔙 Back", callback_data="adminchat_back")]]
         reply_markup = InlineKeyboardMarkup(keyboard)
@@ -181,24 +245,34 @@ class AdminChatSystem:
         await query.edit_message_text(
             history_text,
             reply_markup=reply_markup,
-            parse_mode='Markdown'
+            parse_mode='HTML'
         )
     
     async def _end_all_chats(self, query, context):
         """End all active chat sessions"""
         count = len(self.active_chats)
         
-        # Notify all users
-        for user_id in list(self.active_chats.keys()):
-            try:
-                await context.bot.send_message(
+        # Notify all users concurrently, in batches that stay under the rate limit
+        user_ids = list(self.active_chats.keys())
+        for start in range(0, len(user_ids), self.NOTIFY_BATCH_SIZE):
+            if start:
+                await asyncio.sleep(self.NOTIFY_BATCH_DELAY)
+            batch = user_ids[start:start + self.NOTIFY_BATCH_SIZE]
+            results = await asyncio.gather(*(
+                context.bot.send_message(
                     chat_id=user_id,
                     text="🤖 Support session ended. Thank you for using our service!"
                 )
-            except:
-                pass
+                for user_id in batch
+            ), return_exceptions=True)
+            for user_id, result in zip(batch, results):
+                if isinstance(result, (TelegramError, OSError)):
+                    logger.debug("send failed for %s: %s", user_id, result)
+                elif isinstance(result, Exception):
+                    logger.error(f"Unexpected error notifying user {user_id}: {result}")
         
         self.active_chats.clear()
+        self._admin_to_user.clear()
         
         await query.edit_message_text(
             f"✅ **All Chats Ended**\n\n"
@@ -209,27 +283,20 @@ class AdminChatSystem:
     
     async def _show_admin_chat_menu(self, query, context):
         """Show main admin chat menu"""
-        keyboard = [
-            [InlineKeyboardButton("👥 View Active Users", callback_data="adminchat_users")],
-            [InlineKeyboardButton("💬 Chat with User", callback_data="adminchat_start")],
-            [InlineKeyboardButton("📋 Chat History", callback_data="adminchat_history")],
-            [InlineKeyboardButton("❌ End All Chats", callback_data="adminchat_end_all")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        active_count = len(self.active_chats)
-        chat_text = (
-            f"🔐 **Hidden Admin Chat System**\n\n"
-            f"**Status:**\n"
-            f"• Active Chats: {active_count}\n"
-            f"• Online Admins: {len(Config.ADMIN_IDS)}\n"
-            f"• Total Users: {self._get_total_users()}\n\n"
-            f"**Select an option:**"
+        await self._render_menu(query.edit_message_text)
+    
+    async def _render_menu(self, send, show_features: bool = False):
+        """Render the admin chat menu through send (reply_text or edit_message_text)"""
+        chat_text = _MENU_TEMPLATE.format(
+            active=len(self.active_chats),
+            admins=len(Config.ADMIN_ID_SET),
+            total=await self._get_total_users(),
+            features=_MENU_FEATURES if show_features else ""
         )
         
-        await query.edit_message_text(
+        await send(
             chat_text,
-            reply_markup=reply_markup,
+            reply_markup=_MENU_KEYBOARD,
             parse_mode='Markdown'
         )
     
@@ -237,19 +304,17 @@ class AdminChatSystem:
         """Handle messages from admin during chat session"""
         admin_id = update.effective_user.id
         
-        if admin_id not in Config.ADMIN_IDS:
+        if admin_id not in Config.ADMIN_ID_SET:
             return False
         
         # Check if admin is in active chat
-        user_id = None
-        for uid, chat_info in self.active_chats.items():
-            if chat_info['admin_id'] == admin_id:
-                user_id = uid
-                break
+        user_id = self._admin_to_user.get(admin_id)
         
         if not user_id:
             return False
         
+        self._touch_chat(user_id)
+        
         # Forward message to user as "Support Bot"
         try:
             message_text = update.message.text
@@ -263,17 +328,14 @@ class AdminChatSystem:
                 return True
             
             # Forward normal message
+            # Plain text: arbitrary admin text would break Markdown parsing
             await context.bot.send_message(
                 chat_id=user_id,
-                text=f"🤖 **Support Bot:** {message_text}",
-                parse_mode='Markdown'
+                text=f"🤖 Support Bot: {message_text}"
             )
             
-            # Confirm to admin
-            await update.message.reply_text(
-                f"✅ Message sent to User {user_id}",
-                parse_mode='Markdown'
-            )
+            # Confirm to admin with a reaction rather than a new message
+            await self._confirm_delivery(update, context, admin_id)
             
             return True
             
@@ -286,19 +348,24 @@ class AdminChatSystem:
         """Handle messages from users during chat session"""
         user_id = update.effective_user.id
         
+        # New activity must show up in the admin views
+        self.invalidate_recent_messages()
+        
         if user_id not in self.active_chats:
             return False
         
+        self._touch_chat(user_id)
+        
         # Forward message to admin
         try:
             admin_id = self.active_chats[user_id]['admin_id']
             username = update.effective_user.username or f"User_{user_id}"
             message_text = update.message.text
             
+            # Plain text: arbitrary user text would break Markdown parsing
             await context.bot.send_message(
                 chat_id=admin_id,
-                text=f"💬 **@{username} (ID: {user_id}):** {message_text}",
-                parse_mode='Markdown'
+                text=f"💬 @{username} (ID: {user_id}): {message_text}"
             )
             
             # Auto-reply to user
@@ -313,20 +380,87 @@ class AdminChatSystem:
             logger.error(f"Error forwarding user message: {e}")
             return False
     
+    async def _confirm_delivery(self, update: Update, context: ContextTypes.DEFAULT_TYPE, admin_id: int):
+        """React ✅ to the admin's message, at most once per CONFIRM_DEBOUNCE_SECONDS"""
+        now = time.monotonic()
+        if now - self._last_confirm.get(admin_id, float('-inf')) < self.CONFIRM_DEBOUNCE_SECONDS:
+            return
+        self._last_confirm[admin_id] = now
+        
+        try:
+            await context.bot.set_message_reaction(
+                chat_id=admin_id,
+                message_id=update.message.message_id,
+                reaction=[ReactionTypeEmoji('✅')]
+            )
+        except TelegramError as e:
+            logger.warning(f"Could not confirm delivery to admin {admin_id}: {e}")
+    
+    def _touch_chat(self, user_id: int):
+        """Record activity on a chat session so it isn't reaped as idle"""
+        self.active_chats[user_id]['last_activity'] = time.monotonic()
+        self.active_chats.move_to_end(user_id)
+    
+    def schedule_session_gc(self, job_queue):
+        """Register the periodic idle-session sweep on the application's job queue"""
+        job_queue.run_repeating(
+            self._gc_sessions,
+            interval=self.SESSION_GC_INTERVAL,
+            first=self.SESSION_GC_INTERVAL,
+            name="adminchat_session_gc"
+        )
+    
+    async def _gc_sessions(self, context: ContextTypes.DEFAULT_TYPE):
+        """Close chat sessions that have been idle longer than SESSION_IDLE_TIMEOUT"""
+        cutoff = time.monotonic() - self.SESSION_IDLE_TIMEOUT
+        
+        # active_chats is ordered by last activity, so stop at the first live session
+        expired = []
+        for user_id, chat_info in self.active_chats.items():
+            if chat_info['last_activity'] > cutoff:
+                break
+            expired.append(user_id)
+        
+        for user_id in expired:
+            await self._close_chat(context, user_id)
+        
+        if expired:
+            logger.info(f"Closed {len(expired)} idle admin chat sessions")
+    
+    async def _close_chat(self, context, user_id: int) -> bool:
+        """Remove a chat session and notify the user; False if there was none"""
+        if user_id not in self.active_chats:
+            return False
+        
+        chat_info = self.active_chats.pop(user_id)
+        self._admin_to_user.pop(chat_info['admin_id'], None)
+        
+        # Notify user; they may have blocked the bot
+        try:
+            await context.bot.send_message(
+                chat_id=user_id,
+                text="🤖 Support session ended. Thank you!"
+            )
+        except (TelegramError, OSError) as e:
+            logger.debug("send failed for %s: %s", user_id, e)
+        
+        return True
+    
+    async def _end_chat_with_user(self, query, context, user_id: int):
+        """End chat session from the admin chat buttons"""
+        await self._close_chat(context, user_id)
+        
+        keyboard = [[InlineKeyboardButton("🔙 Back", callback_data="adminchat_back")]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        
+        await query.edit_message_text(
+            f"✅ Chat with User {user_id} ended.",
+            reply_markup=reply_markup
+        )
+    
     async def _end_chat_with_user_direct(self, update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int):
         """End chat session directly from admin"""
-        if user_id in self.active_chats:
-            del self.active_chats[user_id]
-            
-            # Notify user
-            try:
-                await context.bot.send_message(
-                    chat_id=user_id,
-                    text="🤖 Support session ended. Thank you!"
-                )
-            except:
-                pass
-            
+        if await self._close_chat(context, user_id):
             await update.message.reply_text(
                 f"✅ Chat with User {user_id} ended.",
                 parse_mode='Markdown'
@@ -335,32 +469,67 @@ class AdminChatSystem:
     async def _show_user_info(self, update: Update, context: ContextTypes.DEFAULT_TYPE, user_id: int):
         """Show user information to admin"""
         try:
-            # Get user stats
-            stats = self.db.get_stats()
-            user_messages = self.db.get_recent_user_messages(limit=100)
-            user_specific = [msg for msg in user_messages if msg['user_id'] == user_id]
+            user_specific = await asyncio.to_thread(self.db.get_user_messages, user_id, 5)
+            message_count = await asyncio.to_thread(self.db.count_user_messages, user_id)
             
-            info_text = (
-                f"👤 **User Information**\n\n"
-                f"**User ID:** {user_id}\n"
-                f"**Messages Sent:** {len(user_specific)}\n"
-                f"**Chat Started:** {self.active_chats[user_id]['started_at'].strftime('%H:%M:%S')}\n\n"
-                f"**Recent Activity:**\n"
-            )
+            text_parts = [
+                f"👤 <b>User Information</b>\n\n"
+                f"<b>User ID:</b> {user_id}\n"
+                f"<b>Messages Sent:</b> {message_count}\n"
+                f"<b>Chat Started:</b> {self.active_chats[user_id]['started_at_str']}\n\n"
+                f"<b>Recent Activity:</b>\n"
+            ]
             
             for msg in user_specific[:5]:
-                msg_text = msg['message_text'][:30] + "..." if len(msg['message_text']) > 30 else msg['message_text']
-                info_text += f"• {msg_text}\n"
+                text_parts.append(f"• {html.escape(_preview(msg['message_text'], 30))}\n")
             
-            await update.message.reply_text(info_text, parse_mode='Markdown')
+            await update.message.reply_text("".join(text_parts), parse_mode='HTML')
             
         except Exception as e:
             await update.message.reply_text(f"❌ Error getting user info: {e}")
     
-    def _get_total_users(self):
+    async def _get_stats_cached(self) -> dict:
+        """
+        Get a bot stats snapshot, reused for STATS_CACHE_SECONDS.
+        This module should read stats only through here, never via db.get_stats() directly.
+        """
+        now = time.monotonic()
+        if self._stats_cache is not None:
+            stats, fetched_at = self._stats_cache
+            if now - fetched_at < self.STATS_CACHE_SECONDS:
+                return stats
+        
+        stats = await asyncio.to_thread(self.db.get_stats)
+        self._stats_cache = (stats, now)
+        return stats
+    
+    async def _get_total_users(self):
         """Get total number of users"""
         try:
-            stats = self.db.get_stats()
-            return stats.get('total_users', 0)
-        except:
-            return 0
\ No newline at end of file
+            return (await self._get_stats_cached()).get('unique_users', 0)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not load total users: {e}")
+            return 0
+    
+    async def _get_recent(self, limit: int, offset: int = 0):
+        """Get recent user messages, sharing one fetch across back-to-back admin views"""
+        now = time.monotonic()
+        cache = self._recent_cache
+        if (cache['ts'] and now - cache['ts'] < self.RECENT_MESSAGES_CACHE_SECONDS
+                and cache['limit'] >= offset + limit):
+            return cache['rows'][offset:offset + limit]
+        
+        if offset:
+            # Deep pages are rare; read just that window and leave the cache alone
+            return await asyncio.to_thread(
+                self.db.get_recent_user_messages, limit=limit, offset=offset
+            )
+        
+        fetch_limit = max(limit, self.RECENT_MESSAGES_FETCH_LIMIT)
+        rows = await asyncio.to_thread(self.db.get_recent_user_messages, limit=fetch_limit)
+        self._recent_cache = {'ts': now, 'limit': fetch_limit, 'rows': rows}
+        return rows[:limit]
+    
+    def invalidate_recent_messages(self):
+        """Drop cached recent messages so the next admin view re-reads them"""
+        self._recent_cache = {'ts': 0.0, 'limit': 0, 'rows': []}
@@ -1,58 +1,213 @@
+import asyncio
 import logging
+import time
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
+from telegram.helpers import escape_markdown
 from database import Database
 from utils import format_file_size, format_duration
-from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+_PANEL_TEMPLATE = """
+🔐 **Admin Control Panel**
+
+📊 **Quick Stats:**
+• Movies: {total_movies}
+• Downloads: {total_downloads}  
+• Searches: {total_searches}
+• Users: {unique_users}
+
+🎬 **Top Movies:**
+"""
+
+_DETAILED_TEMPLATE = """
+📊 **Detailed Statistics**
+
+**Overall:**
+• Total Movies: {total_movies}
+• Total Downloads: {total_downloads}
+• Total Searches: {total_searches}
+• Unique Users: {unique_users}
+
+**Today's Activity:**
+• Searches: {today_searches}
+• Downloads: {today_downloads}
+
+**Most Active Users:**
+"""
+
+_MANAGEMENT_HEADER = """
+🎬 **Movie Management**
+
+**Popular Movies:**
+"""
+
+_ANALYTICS_TEMPLATE = """
+👥 **User Analytics**
+
+**New Users Today:** {new_users_today}
+
+**Daily Activity (Last 7 Days):**
+"""
+
+_CLEANUP_TEMPLATE = """
+🧹 **Cleanup Options**
+
+**Temporary Files:**
+• Count: {temp_count}
+• Size: {temp_size}
+
+**Old Logs:**
+• Search Logs (>30 days): {old_search_logs}
+• Download Logs (>30 days): {old_download_logs}
+
+**Inactive Content:**
+• Movies (0 downloads, >7 days): {inactive_movies}
+
+**Actions Available:**
+"""
+
+_ADS_HEADER = """
+📢 **Movie Advertisement Panel**
+
+Send advertisement to all users about new movies!
+
+**Recently Added Movies:**
+"""
+
+_USER_MESSAGES_HEADER = """
+💬 **User Messages Monitor**
+
+**Recent user interactions:**
+
+"""
+
+_MOVIE_REQUESTS_HEADER = """
+🎭 **Movie Requests**
+
+**Pending user requests:**
+
+"""
+
+def _build_ad_text(movie: dict) -> str:
+    """Build the MarkdownV2 new-movie advertisement for a movie row"""
+    title = escape_markdown(movie['title'], version=2)
+    year = escape_markdown(str(movie['year']), version=2)
+    quality = escape_markdown(movie['quality'], version=2)
+    size = escape_markdown(format_file_size(movie['file_size']), version=2)
+    return rf"""
+🎬 *NEW MOVIE ALERT\!* 🎬
+
+*{title}* \({year}\)
+📺 Quality: {quality}
+📁 Size: {size}
+
+🆕 Just uploaded\! Search for it now\!
+
+⚠️ *Important:* New movies require fresh verification\!
+Even if you're verified, you'll need to complete verification again for new highlighted movies\.
+
+Type the movie name to search\! 🔍
+"""
+
 class AdminPanel:
     """Admin panel functionality for the bot"""
     
+    STATS_CACHE_SECONDS = 60
+    BROADCAST_CONCURRENCY = 25  # stay under Telegram's ~30 msg/s bulk limit
+    BROADCAST_LOG_BATCH = 100
+    
     def __init__(self, database: Database):
         self.db = database
+        self._stats_cache = {}  # {("stats", top_n): (stats, fetched_at monotonic)}
+        
+        # Static keyboards, built once and shared by every callback
+        self._admin_panel_markup = InlineKeyboardMarkup([
+            [
+                InlineKeyboardButton("📊 Detailed Stats", callback_data="admin_detailed_stats"),
+                InlineKeyboardButton("🎬 Manage Movies", callback_data="admin_manage_movies")
+            ],
+            [
+                InlineKeyboardButton("📢 Movie Ads", callback_data="admin_movie_ads"),
+                InlineKeyboardButton("💬 User Messages", callback_data="admin_user_messages")
+            ],
+            [
+                InlineKeyboardButton("🎭 Movie Requests", callback_data="admin_movie_requests"),
+                InlineKeyboardButton("👥 User Analytics", callback_data="admin_user_analytics")
+            ],
+            [
+                InlineKeyboardButton("🔄 Reset Verifications", callback_data="admin_reset_verifications"),
+                InlineKeyboardButton("🧹 Cleanup", callback_data="admin_cleanup")
+            ]
+        ])
+        self._stats_back_markup = InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Back to Admin Panel", callback_data="admin_back")]])
+        self._management_markup = InlineKeyboardMarkup([
+            [
+                InlineKeyboardButton("🗑️ Clean Low Activity", callback_data="admin_clean_low_activity"),
+                InlineKeyboardButton("📊 Export Data", callback_data="admin_export_data")
+            ],
+            [InlineKeyboardButton("🔙 Back", callback_data="admin_back")]
+        ])
+        self._cleanup_markup = InlineKeyboardMarkup([
+            [
+                InlineKeyboardButton("🗑️ Clean Temp Files", callback_data="admin_clean_temp"),
+                InlineKeyboardButton("📋 Clean Old Logs", callback_data="admin_clean_logs")
+            ],
+            [
+                InlineKeyboardButton("🎬 Clean Inactive Movies", callback_data="admin_clean_inactive"),
+                InlineKeyboardButton("🧹 Full Cleanup", callback_data="admin_full_cleanup")
+            ],
+            [InlineKeyboardButton("🔙 Back", callback_data="admin_back")]
+        ])
+        self._cleanup_back_markup = InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Back to Cleanup", callback_data="admin_cleanup")]])
+        self._user_messages_markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton("🔄 Refresh", callback_data="admin_user_messages")],
+            [InlineKeyboardButton("🔙 Back", callback_data="admin_back")]
+        ])
+        self._movie_requests_markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton("🔄 Refresh", callback_data="admin_movie_requests")],
+            [InlineKeyboardButton("🔙 Back", callback_data="admin_back")]
+        ])
+        self._reset_confirm_markup = InlineKeyboardMarkup([
+            [
+                InlineKeyboardButton("✅ Yes, Reset All", callback_data="admin_confirm_reset"),
+                InlineKeyboardButton("❌ Cancel", callback_data="admin_back")
+            ]
+        ])
+        self._back_markup = InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Back", callback_data="admin_back")]])
+        self._ads_back_markup = InlineKeyboardMarkup([[InlineKeyboardButton("🔙 Back", callback_data="admin_movie_ads")]])
+    
+    def _get_stats_cached(self, top_n: int = 3, ttl: int = STATS_CACHE_SECONDS) -> dict:
+        """Get bot stats, reusing the last result for ttl seconds"""
+        now = time.monotonic()
+        key = ("stats", top_n)
+        cached = self._stats_cache.get(key)
+        if cached is not None and now - cached[1] < ttl:
+            return cached[0]
+        
+        stats = self.db.get_stats(top_n=top_n)
+        self._stats_cache[key] = (stats, now)
+        return stats
+    
+    def invalidate_stats(self):
+        """Forget cached stats after a write that changes them"""
+        self._stats_cache.clear()
     
     async def show_admin_panel(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Show main admin panel"""
         try:
-            stats = self.db.get_stats()
+            stats = self._get_stats_cached()
             
-            admin_message = f"""
-🔐 **Admin Control Panel**
-
-📊 **Quick Stats:**
-• Movies: {stats['total_movies']}
-• Downloads: {stats['total_downloads']}  
-• Searches: {stats['total_searches']}
-• Users: {stats['unique_users']}
-
-🎬 **Top Movies:**
-"""
+            lines = [_PANEL_TEMPLATE.format_map(stats)]
             
-            for i, movie in enumerate(stats['popular_movies'][:3], 1):
-                admin_message += f"{i}. {movie['title']} ({movie['download_count']} downloads)\n"
-            
-            keyboard = [
-                [
-                    InlineKeyboardButton("📊 Detailed Stats", callback_data="admin_detailed_stats"),
-                    InlineKeyboardButton("🎬 Manage Movies", callback_data="admin_manage_movies")
-                ],
-                [
-                    InlineKeyboardButton("📢 Movie Ads", callback_data="admin_movie_ads"),
-                    InlineKeyboardButton("💬 User Messages", callback_data="admin_user_messages")
-                ],
-                [
-                    InlineKeyboardButton("🎭 Movie Requests", callback_data="admin_movie_requests"),
-                    InlineKeyboardButton("👥 User Analytics", callback_data="admin_user_analytics")
-                ],
-                [
-                    InlineKeyboardButton("🔄 Reset Verifications", callback_data="admin_reset_verifications"),
-                    InlineKeyboardButton("🧹 Cleanup", callback_data="admin_cleanup")
-                ]
-            ]
+            for i, movie in enumerate(stats['popular_movies'], 1):
+                lines.append(f"{i}. {movie['title']} ({movie['download_count']} downloads)\n")
             
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            admin_message = "".join(lines)
+            
+            reply_markup = self._admin_panel_markup
             
             await update.message.reply_text(
                 admin_message,
@@ -69,7 +224,7 @@ class AdminPanel:
     async def show_detailed_stats(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Show detailed statistics"""
         try:
-            stats = self.db.get_stats()
+            stats = self._get_stats_cached()
             
             # Get additional stats
             with self.db.get_connection() as conn:
@@ -77,16 +232,15 @@ class AdminPanel:
                 
                 # Today's activity
                 cursor.execute("""
-                    SELECT COUNT(*) as count FROM search_logs 
-                    WHERE DATE(search_date) = DATE('now')
-                """)
-                today_searches = cursor.fetchone()['count']
-                
-                cursor.execute("""
-                    SELECT COUNT(*) as count FROM download_logs 
-                    WHERE DATE(download_date) = DATE('now')
+                    SELECT
+                        (SELECT COUNT(*) FROM search_logs
+                         WHERE search_date >= DATE('now') AND search_date < DATE('now', '+1 day')) as today_searches,
+                        (SELECT COUNT(*) FROM download_logs
+                         WHERE download_date >= DATE('now') AND download_date < DATE('now', '+1 day')) as today_downloads
                 """)
-                today_downloads = cursor.fetchone()['count']
+                today = cursor.fetchone()
+                today_searches = today['today_searches']
+                today_downloads = today['today_downloads']
                 
                 # Most active users
                 cursor.execute("""
@@ -101,7 +255,7 @@ class AdminPanel:
                 
                 # Recent uploads
                 cursor.execute("""
-                    SELECT title, upload_date, download_count 
+                    SELECT title, strftime('%m/%d %H:%M', upload_date) as upload_date_fmt, download_count 
                     FROM movies 
                     WHERE is_active = 1 
                     ORDER BY upload_date DESC 
@@ -109,33 +263,23 @@ class AdminPanel:
                 """)
                 recent_uploads = cursor.fetchall()
             
-            detailed_message = f"""
-📊 **Detailed Statistics**
-
-**Overall:**
-• Total Movies: {stats['total_movies']}
-• Total Downloads: {stats['total_downloads']}
-• Total Searches: {stats['total_searches']}
-• Unique Users: {stats['unique_users']}
-
-**Today's Activity:**
-• Searches: {today_searches}
-• Downloads: {today_downloads}
-
-**Most Active Users:**
-"""
+            lines = [_DETAILED_TEMPLATE.format_map({
+                **stats,
+                'today_searches': today_searches,
+                'today_downloads': today_downloads
+            })]
             
             for i, user in enumerate(active_users, 1):
                 username = user['username'] or 'Anonymous'
-                detailed_message += f"{i}. @{username} ({user['search_count']} searches)\n"
+                lines.append(f"{i}. @{username} ({user['search_count']} searches)\n")
             
-            detailed_message += "\n**Recent Uploads:**\n"
+            lines.append("\n**Recent Uploads:**\n")
             for upload in recent_uploads:
-                upload_date = datetime.fromisoformat(upload['upload_date']).strftime('%m/%d %H:%M')
-                detailed_message += f"• {upload['title']} - {upload_date} ({upload['download_count']} downloads)\n"
+                lines.append(f"• {upload['title']} - {upload['upload_date_fmt']} ({upload['download_count']} downloads)\n")
             
-            keyboard = [[InlineKeyboardButton("🔙 Back to Admin Panel", callback_data="admin_back")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            detailed_message = "".join(lines)
+            
+            reply_markup = self._stats_back_markup
             
             if update.callback_query:
                 await update.callback_query.edit_message_text(
@@ -162,52 +306,44 @@ class AdminPanel:
             with self.db.get_connection() as conn:
                 cursor = conn.cursor()
                 
-                # Get movies with low downloads
+                # Top 5 and bottom 10 movies by downloads, tagged by bucket
                 cursor.execute("""
-                    SELECT id, title, download_count, upload_date, file_size 
-                    FROM movies 
-                    WHERE is_active = 1 
-                    ORDER BY download_count ASC, upload_date DESC 
-                    LIMIT 10
-                """)
-                low_downloads = cursor.fetchall()
-                
-                # Get movies with high downloads
-                cursor.execute("""
-                    SELECT id, title, download_count, upload_date, file_size 
-                    FROM movies 
-                    WHERE is_active = 1 
-                    ORDER BY download_count DESC 
-                    LIMIT 5
+                    SELECT * FROM (
+                        SELECT 'hi' as bucket, id, title, download_count,
+                               strftime('%m/%d', upload_date) as upload_date_fmt, file_size 
+                        FROM movies 
+                        WHERE is_active = 1 
+                        ORDER BY download_count DESC 
+                        LIMIT 5
+                    )
+                    UNION ALL
+                    SELECT * FROM (
+                        SELECT 'lo' as bucket, id, title, download_count,
+                               strftime('%m/%d', upload_date) as upload_date_fmt, file_size 
+                        FROM movies 
+                        WHERE is_active = 1 
+                        ORDER BY download_count ASC, upload_date DESC 
+                        LIMIT 10
+                    )
                 """)
-                popular_movies = cursor.fetchall()
+                rows = cursor.fetchall()
+                popular_movies = [row for row in rows if row['bucket'] == 'hi']
+                low_downloads = [row for row in rows if row['bucket'] == 'lo']
             
-            management_message = f"""
-🎬 **Movie Management**
-
-**Popular Movies:**
-"""
+            lines = [_MANAGEMENT_HEADER]
             
             for movie in popular_movies:
-                upload_date = datetime.fromisoformat(movie['upload_date']).strftime('%m/%d')
                 size = format_file_size(movie['file_size'])
-                management_message += f"• {movie['title']} ({movie['download_count']} downloads, {size}, {upload_date})\n"
+                lines.append(f"• {movie['title']} ({movie['download_count']} downloads, {size}, {movie['upload_date_fmt']})\n")
             
-            management_message += "\n**Low Activity Movies:**\n"
+            lines.append("\n**Low Activity Movies:**\n")
             for movie in low_downloads:
-                upload_date = datetime.fromisoformat(movie['upload_date']).strftime('%m/%d')
                 size = format_file_size(movie['file_size'])
-                management_message += f"• {movie['title']} ({movie['download_count']} downloads, {size}, {upload_date})\n"
-            
-            keyboard = [
-                [
-                    InlineKeyboardButton("🗑️ Clean Low Activity", callback_data="admin_clean_low_activity"),
-                    InlineKeyboardButton("📊 Export Data", callback_data="admin_export_data")
-                ],
-                [InlineKeyboardButton("🔙 Back", callback_data="admin_back")]
-            ]
+                lines.append(f"• {movie['title']} ({movie['download_count']} downloads, {size}, {movie['upload_date_fmt']})\n")
             
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            management_message = "".join(lines)
+            
+            reply_markup = self._management_markup
             
             await update.callback_query.edit_message_text(
                 management_message,
@@ -224,10 +360,13 @@ class AdminPanel:
         try:
             with self.db.get_connection() as conn:
                 cursor = conn.cursor()
+                # One read transaction so all three views share a snapshot
+                cursor.execute("BEGIN")
                 
                 # User activity over time
                 cursor.execute("""
-                    SELECT DATE(search_date) as date, COUNT(*) as searches 
+                    SELECT DATE(search_date) as date, strftime('%m/%d', DATE(search_date)) as date_fmt,
+                           COUNT(*) as searches 
                     FROM search_logs 
                     WHERE search_date >= DATE('now', '-7 days')
                     GROUP BY DATE(search_date) 
@@ -242,41 +381,37 @@ class AdminPanel:
                     WHERE search_date >= DATE('now', '-7 days')
                     GROUP BY LOWER(search_query) 
                     ORDER BY count DESC 
-                    LIMIT 10
+                    LIMIT 5
                 """)
                 popular_searches = cursor.fetchall()
                 
                 # New users (first search)
                 cursor.execute("""
-                    SELECT COUNT(DISTINCT user_id) as new_users 
-                    FROM search_logs 
-                    WHERE DATE(search_date) = DATE('now')
-                    AND user_id NOT IN (
-                        SELECT DISTINCT user_id 
-                        FROM search_logs 
-                        WHERE DATE(search_date) < DATE('now')
+                    SELECT COUNT(DISTINCT s.user_id) as new_users 
+                    FROM search_logs s
+                    WHERE s.search_date >= DATE('now')
+                    AND s.search_date < DATE('now', '+1 day')
+                    AND NOT EXISTS (
+                        SELECT 1 FROM search_logs p
+                        WHERE p.user_id = s.user_id
+                        AND p.search_date < DATE('now')
                     )
                 """)
                 new_users_today = cursor.fetchone()['new_users']
+                conn.commit()
             
-            analytics_message = f"""
-👥 **User Analytics**
-
-**New Users Today:** {new_users_today}
-
-**Daily Activity (Last 7 Days):**
-"""
+            lines = [_ANALYTICS_TEMPLATE.format(new_users_today=new_users_today)]
             
             for activity in daily_activity:
-                date_str = datetime.fromisoformat(activity['date']).strftime('%m/%d')
-                analytics_message += f"• {date_str}: {activity['searches']} searches\n"
+                lines.append(f"• {activity['date_fmt']}: {activity['searches']} searches\n")
             
-            analytics_message += "\n**Popular Searches (Last 7 Days):**\n"
-            for i, search in enumerate(popular_searches[:5], 1):
-                analytics_message += f"{i}. '{search['search_query']}' ({search['count']} times)\n"
+            lines.append("\n**Popular Searches (Last 7 Days):**\n")
+            for i, search in enumerate(popular_searches, 1):
+                lines.append(f"{i}. '{search['search_query']}' ({search['count']} times)\n")
             
-            keyboard = [[InlineKeyboardButton("🔙 Back", callback_data="admin_back")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            analytics_message = "".join(lines)
+            
+            reply_markup = self._back_markup
             
             await update.callback_query.edit_message_text(
                 analytics_message,
@@ -300,57 +435,31 @@ class AdminPanel:
             with self.db.get_connection() as conn:
                 cursor = conn.cursor()
                 
-                # Old logs
-                cursor.execute("""
-                    SELECT COUNT(*) as count FROM search_logs 
-                    WHERE search_date < DATE('now', '-30 days')
-                """)
-                old_search_logs = cursor.fetchone()['count']
-                
-                cursor.execute("""
-                    SELECT COUNT(*) as count FROM download_logs 
-                    WHERE download_date < DATE('now', '-30 days')
-                """)
-                old_download_logs = cursor.fetchone()['count']
-                
-                # Inactive movies
+                # Old logs and inactive movies in one round-trip
                 cursor.execute("""
-                    SELECT COUNT(*) as count FROM movies 
-                    WHERE is_active = 1 AND download_count = 0 
-                    AND upload_date < DATE('now', '-7 days')
+                    SELECT
+                        (SELECT COUNT(*) FROM search_logs
+                         WHERE search_date < DATE('now', '-30 days')) as old_search_logs,
+                        (SELECT COUNT(*) FROM download_logs
+                         WHERE download_date < DATE('now', '-30 days')) as old_download_logs,
+                        (SELECT COUNT(*) FROM movies
+                         WHERE is_active = 1 AND download_count = 0
+                         AND upload_date < DATE('now', '-7 days')) as inactive_movies
                 """)
-                inactive_movies = cursor.fetchone()['count']
-            
-            cleanup_message = f"""
-🧹 **Cleanup Options**
-
-**Temporary Files:**
-• Count: {len(temp_files)}
-• Size: {format_file_size(temp_size)}
-
-**Old Logs:**
-• Search Logs (>30 days): {old_search_logs}
-• Download Logs (>30 days): {old_download_logs}
-
-**Inactive Content:**
-• Movies (0 downloads, >7 days): {inactive_movies}
-
-**Actions Available:**
-"""
-            
-            keyboard = [
-                [
-                    InlineKeyboardButton("🗑️ Clean Temp Files", callback_data="admin_clean_temp"),
-                    InlineKeyboardButton("📋 Clean Old Logs", callback_data="admin_clean_logs")
-                ],
-                [
-                    InlineKeyboardButton("🎬 Clean Inactive Movies", callback_data="admin_clean_inactive"),
-                    InlineKeyboardButton("🧹 Full Cleanup", callback_data="admin_full_cleanup")
-                ],
-                [InlineKeyboardButton("🔙 Back", callback_data="admin_back")]
-            ]
+                counts = cursor.fetchone()
+                old_search_logs = counts['old_search_logs']
+                old_download_logs = counts['old_download_logs']
+                inactive_movies = counts['inactive_movies']
+            
+            cleanup_message = _CLEANUP_TEMPLATE.format(
+                temp_count=len(temp_files),
+                temp_size=format_file_size(temp_size),
+                old_search_logs=old_search_logs,
+                old_download_logs=old_download_logs,
+                inactive_movies=inactive_movies
+            )
             
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            reply_markup = self._cleanup_markup
             
             await update.callback_query.edit_message_text(
                 cleanup_message,
@@ -373,60 +482,54 @@ class AdminPanel:
                 deleted_files = file_manager.cleanup_old_files(max_age_hours=1)
                 results['temp_files'] = deleted_files
             
-            if cleanup_type in ['logs', 'full']:
+            if cleanup_type in ['logs', 'inactive', 'full']:
+                # All DML for this cleanup shares one transaction and one commit
                 with self.db.get_connection() as conn:
                     cursor = conn.cursor()
                     
-                    # Clean old search logs
-                    cursor.execute("""
-                        DELETE FROM search_logs 
-                        WHERE search_date < DATE('now', '-30 days')
-                    """)
-                    search_logs_deleted = cursor.rowcount
-                    
-                    # Clean old download logs
-                    cursor.execute("""
-                        DELETE FROM download_logs 
-                        WHERE download_date < DATE('now', '-30 days')
-                        AND auto_delete_date IS NULL
-                    """)
-                    download_logs_deleted = cursor.rowcount
+                    if cleanup_type in ['logs', 'full']:
+                        # Clean old search logs
+                        cursor.execute("""
+                            DELETE FROM search_logs 
+                            WHERE search_date < DATE('now', '-30 days')
+                        """)
+                        results['search_logs'] = cursor.rowcount
+                        
+                        # Clean old download logs
+                        cursor.execute("""
+                            DELETE FROM download_logs 
+                            WHERE download_date < DATE('now', '-30 days')
+                            AND auto_delete_date IS NULL
+                        """)
+                        results['download_logs'] = cursor.rowcount
                     
-                    conn.commit()
-                    
-                    results['search_logs'] = search_logs_deleted
-                    results['download_logs'] = download_logs_deleted
-            
-            if cleanup_type in ['inactive', 'full']:
-                with self.db.get_connection() as conn:
-                    cursor = conn.cursor()
+                    if cleanup_type in ['inactive', 'full']:
+                        # Mark inactive movies as inactive
+                        cursor.execute("""
+                            UPDATE movies 
+                            SET is_active = 0 
+                            WHERE is_active = 1 AND download_count = 0 
+                            AND upload_date < DATE('now', '-7 days')
+                        """)
+                        results['inactive_movies'] = cursor.rowcount
                     
-                    # Mark inactive movies as inactive
-                    cursor.execute("""
-                        UPDATE movies 
-                        SET is_active = 0 
-                        WHERE is_active = 1 AND download_count = 0 
-                        AND upload_date < DATE('now', '-7 days')
-                    """)
-                    inactive_movies = cursor.rowcount
                     conn.commit()
-                    
-                    results['inactive_movies'] = inactive_movies
             
             # Create results message
-            results_message = "✅ **Cleanup Completed**\n\n"
+            lines = ["✅ **Cleanup Completed**\n\n"]
             
             if 'temp_files' in results:
-                results_message += f"🗑️ Temporary files deleted: {results['temp_files']}\n"
+                lines.append(f"🗑️ Temporary files deleted: {results['temp_files']}\n")
             if 'search_logs' in results:
-                results_message += f"📋 Search logs cleaned: {results['search_logs']}\n"
+                lines.append(f"📋 Search logs cleaned: {results['search_logs']}\n")
             if 'download_logs' in results:
-                results_message += f"📋 Download logs cleaned: {results['download_logs']}\n"
+                lines.append(f"📋 Download logs cleaned: {results['download_logs']}\n")
             if 'inactive_movies' in results:
-                results_message += f"🎬 Movies marked inactive: {results['inactive_movies']}\n"
+                lines.append(f"🎬 Movies marked inactive: {results['inactive_movies']}\n")
             
-            keyboard = [[InlineKeyboardButton("🔙 Back to Cleanup", callback_data="admin_cleanup")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            results_message = "".join(lines)
+            
+            reply_markup = self._cleanup_back_markup
             
             await update.callback_query.edit_message_text(
                 results_message,
@@ -434,6 +537,7 @@ class AdminPanel:
                 parse_mode='Markdown'
             )
             
+            self.invalidate_stats()
             logger.info(f"Cleanup performed: {cleanup_type}, Results: {results}")
             
         except Exception as e:
@@ -447,23 +551,21 @@ class AdminPanel:
             with self.db.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
-                    SELECT id, title, year, quality, upload_date 
+                    SELECT id, title, year, quality, file_size 
                     FROM movies WHERE is_active = 1 
                     ORDER BY upload_date DESC LIMIT 10
                 """)
                 movies = cursor.fetchall()
             
-            ad_message = """
-📢 **Movie Advertisement Panel**
-
-Send advertisement to all users about new movies!
-
-**Recently Added Movies:**
-"""
+            # Remember the listed movies so advertise_movie can skip a refetch
+            context.user_data['recent_movies'] = {movie['id']: dict(movie) for movie in movies}
+            
+            lines = [_ADS_HEADER]
             
             for i, movie in enumerate(movies[:5], 1):
-                upload_date = datetime.fromisoformat(movie['upload_date']).strftime('%Y-%m-%d')
-                ad_message += f"{i}. {movie['title']} ({movie['year']}) - {movie['quality']}\n"
+                lines.append(f"{i}. {movie['title']} ({movie['year']}) - {movie['quality']}\n")
+            
+            ad_message = "".join(lines)
             
             keyboard = []
             for movie in movies[:5]:
@@ -490,27 +592,18 @@ Send advertisement to all users about new movies!
         try:
             messages = self.db.get_recent_user_messages(20)
             
-            messages_text = """
-💬 **User Messages Monitor**
-
-**Recent user interactions:**
-
-"""
+            lines = [_USER_MESSAGES_HEADER]
             
             if not messages:
-                messages_text += "No recent messages found."
+                lines.append("No recent messages found.")
             else:
                 for msg in messages:
                     username = f"@{msg['username']}" if msg['username'] else f"User {msg['user_id']}"
-                    date = datetime.fromisoformat(msg['message_date']).strftime('%m-%d %H:%M')
-                    message_preview = msg['message_text'][:50] + "..." if len(msg['message_text']) > 50 else msg['message_text']
-                    messages_text += f"• **{username}** ({date}): {message_preview}\n"
+                    lines.append(f"• **{username}** ({msg['message_date_fmt']}): {msg['preview']}\n")
             
-            keyboard = [
-                [InlineKeyboardButton("🔄 Refresh", callback_data="admin_user_messages")],
-                [InlineKeyboardButton("🔙 Back", callback_data="admin_back")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            messages_text = "".join(lines)
+            
+            reply_markup = self._user_messages_markup
             
             await update.callback_query.edit_message_text(
                 messages_text,
@@ -527,26 +620,18 @@ Send advertisement to all users about new movies!
         try:
             requests = self.db.get_movie_requests()
             
-            requests_text = """
-🎭 **Movie Requests**
-
-**Pending user requests:**
-
-"""
+            lines = [_MOVIE_REQUESTS_HEADER]
             
             if not requests:
-                requests_text += "No pending movie requests."
+                lines.append("No pending movie requests.")
             else:
                 for req in requests:
                     username = req['username'] or 'Unknown'
-                    date = datetime.fromisoformat(req['request_date']).strftime('%m-%d %H:%M')
-                    requests_text += f"• **{req['movie_name']}** by {username} ({date})\n"
+                    lines.append(f"• **{req['movie_name']}** by {username} ({req['request_date_fmt']})\n")
             
-            keyboard = [
-                [InlineKeyboardButton("🔄 Refresh", callback_data="admin_movie_requests")],
-                [InlineKeyboardButton("🔙 Back", callback_data="admin_back")]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            requests_text = "".join(lines)
+            
+            reply_markup = self._movie_requests_markup
             
             await update.callback_query.edit_message_text(
                 requests_text,
@@ -562,13 +647,7 @@ Send advertisement to all users about new movies!
         """Reset all user verifications"""
         try:
             # Show confirmation first
-            keyboard = [
-                [
-                    InlineKeyboardButton("✅ Yes, Reset All", callback_data="admin_confirm_reset"),
-                    InlineKeyboardButton("❌ Cancel", callback_data="admin_back")
-                ]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            reply_markup = self._reset_confirm_markup
             
             await update.callback_query.edit_message_text(
                 "⚠️ **Reset All Verifications**\n\n"
@@ -587,9 +666,9 @@ Send advertisement to all users about new movies!
         """Confirm and execute verification reset"""
         try:
             self.db.reset_all_verifications()
+            self.invalidate_stats()
             
-            keyboard = [[InlineKeyboardButton("🔙 Back", callback_data="admin_back")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            reply_markup = self._back_markup
             
             await update.callback_query.edit_message_text(
                 "✅ **All Verifications Reset!**\n\n"
@@ -608,49 +687,53 @@ Send advertisement to all users about new movies!
     async def advertise_movie(self, update: Update, context: ContextTypes.DEFAULT_TYPE, movie_id: int):
         """Send movie advertisement to all users"""
         try:
-            # Get movie details
-            movie = self.db.get_movie_by_id(movie_id)
+            # Get movie details, reusing the row listed by show_movie_advertisements
+            movie = context.user_data.get('recent_movies', {}).get(movie_id) or self.db.get_movie_by_id(movie_id)
             if not movie:
                 await update.callback_query.answer("❌ Movie not found.")
                 return
             
-            # Get all users
-            user_ids = self.db.get_all_users_for_broadcast()
-            
-            # Create advertisement message
-            ad_text = f"""
-🎬 **NEW MOVIE ALERT!** 🎬
-
-**{movie['title']}** ({movie['year']})
-📺 Quality: {movie['quality']}
-📁 Size: {format_file_size(movie['file_size'])}
-
-🆕 Just uploaded! Search for it now!
-
-⚠️ **Important:** New movies require fresh verification!
-Even if you're verified, you'll need to complete verification again for new highlighted movies.
-
-Type the movie name to search! 🔍
-"""
-            
-            # Send to all users
-            sent_count = 0
-            failed_count = 0
-            
-            for user_id in user_ids:
-                try:
-                    await context.bot.send_message(
-                        chat_id=user_id,
-                        text=ad_text,
-                        parse_mode='Markdown'
-                    )
-                    sent_count += 1
-                except Exception:
-                    failed_count += 1
+            # Get users not yet reached by an earlier run of this broadcast
+            user_ids = self.db.get_pending_broadcast_users(movie_id)
+            
+            # Create advertisement message once; every send reuses it
+            ad_text = _build_ad_text(movie)
+            
+            # Send to all users, a bounded number in flight at once
+            semaphore = asyncio.Semaphore(self.BROADCAST_CONCURRENCY)
+            delivered = []
+            
+            def _flush_delivered():
+                if delivered:
+                    self.db.log_broadcast_deliveries(movie_id, delivered)
+                    delivered.clear()
+            
+            async def _send(user_id):
+                async with semaphore:
+                    try:
+                        await context.bot.send_message(
+                            chat_id=user_id,
+                            text=ad_text,
+                            parse_mode=ParseMode.MARKDOWN_V2
+                        )
+                    except Exception:
+                        return 0
+                    delivered.append(user_id)
+                    if len(delivered) >= self.BROADCAST_LOG_BATCH:
+                        _flush_delivered()
+                    return 1
+            
+            try:
+                results = await asyncio.gather(*(_send(user_id) for user_id in user_ids))
+            finally:
+                _flush_delivered()
+            sent_count = sum(results)
+            failed_count = len(results) - sent_count
+            
+            self.invalidate_stats()
             
             # Show results
-            keyboard = [[InlineKeyboardButton("🔙 Back", callback_data="admin_movie_ads")]]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            reply_markup = self._ads_back_markup
             
             await update.callback_query.edit_message_text(
                 f"📢 **Advertisement Sent!**\n\n"
@@ -3,47 +3,395 @@ Complete Auto Filter Movie Bot with Daily Verification System
 """
 
 import os
+import re
+import atexit
+import hashlib
 import logging
+import logging.handlers
 import asyncio
+import multiprocessing as mp
+import queue
+import time
+from collections import Counter
 from datetime import datetime, timedelta
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from types import SimpleNamespace
+from telegram import Bot, Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters, ContextTypes
 from flask import Flask
-from models import db, User, Movie, UserVerification, DownloadLog, SearchLog
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models import db, User, Movie, UserVerification, DownloadLog, SearchLog, ensure_movie_search_index, ensure_query_indexes, run_in_app_context
 from verification_system import VerificationSystem
+from movie_trie import MovieTrie
+from rate_limiter import RateLimiter
 from config import Config
-from utils import parse_upload_caption, format_file_size, fuzzy_search_movies
+from utils import parse_upload_caption, format_file_size, TTLMap, ChatSerializer
 
-# Configure logging
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO,
-    handlers=[
-        logging.FileHandler('auto_filter_bot.log'),
-        logging.StreamHandler()
-    ]
-)
+# Configure logging: handlers only enqueue records, a listener thread does the file/console IO
+_log_records = queue.Queue(-1)
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_log_outputs = [logging.FileHandler('auto_filter_bot.log'), logging.StreamHandler()]
+for _handler in _log_outputs:
+    _handler.setFormatter(_log_formatter)
+
+# The outputs format the full line; the queue side must not prefix the message itself
+_log_enqueue = logging.handlers.QueueHandler(_log_records)
+_log_enqueue.setFormatter(logging.Formatter('%(message)s'))
+
+logging.basicConfig(level=logging.INFO, handlers=[_log_enqueue])
+# Started alongside the QueueHandler so importers (and spawned workers) keep their logs
+_log_listener = logging.handlers.QueueListener(_log_records, *_log_outputs)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
+# How long a delivered file stays before the auto-delete notice
+_AUTO_DELETE_DELTA = timedelta(minutes=Config.AUTO_DELETE_MINUTES)
+
+# Message templates, filled with str.format_map(_movie_fields(movie))
+_MOVIE_DETAILS_TMPL = (
+    "🎬 **{title}**\n"
+    "📅 Year: {year}\n"
+    "🎯 Quality: {quality}\n"
+    "📁 Size: {size}\n\n"
+)
+_AUTO_DELETE_NOTE = f"⏰ File will auto-delete in {Config.AUTO_DELETE_MINUTES} minutes"
+_FILE_CAPTION_TMPL = _MOVIE_DETAILS_TMPL + _AUTO_DELETE_NOTE
+_VERIFIED_FILE_CAPTION_TMPL = _MOVIE_DETAILS_TMPL + "✅ Verification successful!\n" + _AUTO_DELETE_NOTE
+_VERIFICATION_REQUIRED_TMPL = _MOVIE_DETAILS_TMPL + (
+    "⚠️ **Daily Verification Required**\n\n"
+    "📋 आपको daily verification complete करना होगा:\n\n"
+    "1️⃣ नीचे दिए गए link पर click करें\n"
+    "2️⃣ Page load होने तक wait करें (5-10 seconds)\n"
+    "3️⃣ Verification complete होने पर bot में वापस आएं\n\n"
+    "🔗 **Verification Link:**\n{short_url}\n\n"
+    "⏰ Link valid है 24 hours के लिए\n"
+    "✅ एक बार verify करने पर 24 hours तक सभी movies free access"
+)
+
+def _movie_fields(movie) -> dict:
+    """Template fields shared by the movie detail messages"""
+    return {
+        'title': movie.title,
+        'year': movie.year or 'N/A',
+        'quality': movie.quality or 'HD',
+        'size': format_file_size(movie.file_size)
+    }
+
+_WHITESPACE = re.compile(r'\s+')
+
+def _normalize_query(query: str) -> str:
+    """Canonical search key so "Avengers ", "avengers" and "AVENGERS" share one lookup"""
+    return _WHITESPACE.sub(' ', query.strip().lower())
+
+def _search_cache_key(query: str) -> str:
+    """Bounded cache key for a normalized query; long queries are keyed by their digest"""
+    if len(query) <= 64:
+        return query
+    return hashlib.sha1(query.encode()).hexdigest()
+
+# Only the columns the search results keyboard needs
+_RESULT_COLUMNS = (Movie.id, Movie.title, Movie.year, Movie.quality)
+
+def _create_flask_app() -> Flask:
+    """Flask app bound to the bot database"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.secret_key = os.environ.get('FLASK_SECRET_KEY', 'auto-filter-bot-secret')
+    
+    db.init_app(app)
+    return app
+
+def _create_schema() -> bool:
+    """Create tables and search indexes; returns True when full-text search is available"""
+    db.create_all()
+    ensure_query_indexes()
+    use_fulltext_search = ensure_movie_search_index()
+    logger.info("Database tables created successfully")
+    return use_fulltext_search
+
+def _movie_snapshot(movie: Movie) -> SimpleNamespace:
+    """Detached copy of the movie fields handlers read after the session closes"""
+    return SimpleNamespace(
+        id=movie.id,
+        title=movie.title,
+        year=movie.year,
+        quality=movie.quality,
+        language=movie.language,
+        file_id=movie.file_id,
+        file_size=movie.file_size,
+        download_count=movie.download_count
+    )
+
 class AutoFilterBot:
     """Main Auto Filter Bot class with daily verification"""
     
-    def __init__(self):
-        self.verification_system = VerificationSystem()
-        self.setup_flask_app()
+    TITLE_INDEX_REFRESH_SECONDS = 10 * 60
+    LOG_FLUSH_INTERVAL = 0.5
+    FUZZY_FALLBACK_RESULTS = 3  # try typo matching when prefix search finds fewer
+    FUZZY_MIN_QUERY_LENGTH = 4
+    LOG_FLUSH_BATCH = 500
+    DOWNLOAD_COUNT_FLUSH_INTERVAL = 5
+    CHAT_WORKER_IDLE_SECONDS = 300  # a chat's worker exits after this long without updates
+    SEARCH_CACHE_SECONDS = 30
+    SEARCH_CACHE_MAX_QUERIES = 10000
+    SEARCH_LOG_MAX_QUERY = 128  # matches SearchLog.query column length
+    
+    def __init__(self, init_schema: bool = True, title_index: bool = True):
+        self.setup_flask_app(init_schema, title_index)
+        self.verification_system = VerificationSystem(self.app)
+        # SearchLog / DownloadLog rows waiting to be written in bulk
+        self._log_queue: asyncio.Queue = asyncio.Queue()
+        self._chats = ChatSerializer(self.CHAT_WORKER_IDLE_SECONDS)
+        self._search_cache = TTLMap(self.SEARCH_CACHE_MAX_QUERIES, self.SEARCH_CACHE_SECONDS)  # {_search_cache_key: rows}
+        self._pending_downloads = Counter()  # {movie_id: downloads not yet added to movies}
+        # Queues of the other worker processes when sharded; see apply_shard_event
+        self._peers: list = []
+        
+        # /start keyboards never change, so build them once
+        start_rows = [
+            [InlineKeyboardButton("🎬 Search Movies", callback_data="search_help")],
+            [InlineKeyboardButton("📊 My Stats", callback_data="user_stats")],
+            [InlineKeyboardButton("ℹ️ Help", callback_data="help")]
+        ]
+        self._start_kb_user = InlineKeyboardMarkup(start_rows)
+        self._start_kb_admin = InlineKeyboardMarkup(
+            start_rows + [[InlineKeyboardButton("🔐 Admin Panel", callback_data="admin_panel")]]
+        )
     
-    def setup_flask_app(self):
-        """Setup Flask app for database"""
-        self.app = Flask(__name__)
-        self.app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL')
-        self.app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-        self.app.secret_key = os.environ.get('FLASK_SECRET_KEY', 'auto-filter-bot-secret')
+    def setup_flask_app(self, init_schema: bool = True, title_index: bool = True):
+        """Setup Flask app for database
         
-        db.init_app(self.app)
+        Sharded workers pass init_schema=False: the parent process has already
+        created the tables and indexes before spawning them. With
+        title_index=False no trie is built and searches go to the database.
+        """
+        self.app = _create_flask_app()
         
         with self.app.app_context():
-            db.create_all()
-            logger.info("Database tables created successfully")
+            if init_schema:
+                self.use_fulltext_search = _create_schema()
+            else:
+                self.use_fulltext_search = db.engine.dialect.name == 'postgresql'
+            
+            self.title_index = self._build_title_index() if title_index else None
+    
+    def _build_title_index(self) -> MovieTrie:
+        """Build the in-memory title trie from active movies"""
+        trie = MovieTrie()
+        rows = Movie.query.filter_by(is_active=True).with_entities(
+            Movie.id, Movie.title, Movie.download_count
+        ).all()
+        for movie_id, title, download_count in rows:
+            trie.insert(title, movie_id, download_count or 0)
+        
+        logger.info(f"Title index built with {trie.size} movies")
+        return trie
+    
+    async def flush_logs(self, context: ContextTypes.DEFAULT_TYPE = None):
+        """Write queued search and download logs in one batch per call"""
+        batch = []
+        while len(batch) < self.LOG_FLUSH_BATCH and not self._log_queue.empty():
+            batch.append(self._log_queue.get_nowait())
+        
+        if not batch:
+            return
+        
+        try:
+            await run_in_app_context(self.app, self._save_logs, batch)
+        except Exception as e:
+            logger.error(f"Error flushing {len(batch)} log rows: {e}")
+    
+    def per_chat(self, handler):
+        """Wrap a handler so its updates run in order per chat but concurrently across chats"""
+        return self._chats.wrap(handler)
+    
+    async def flush_download_counts(self, context: ContextTypes.DEFAULT_TYPE = None):
+        """Add the download counts gathered since the last flush in one transaction"""
+        if not self._pending_downloads:
+            return
+        
+        counts, self._pending_downloads = self._pending_downloads, Counter()
+        try:
+            await run_in_app_context(self.app, self._apply_download_counts, counts)
+        except Exception as e:
+            # Keep the counts for the next flush rather than losing them
+            self._pending_downloads.update(counts)
+            logger.error(f"Error flushing download counts for {len(counts)} movies: {e}")
+    
+    async def shutdown(self, application: Application):
+        """Stop per-chat workers and flush any logs and counts still queued when the bot stops"""
+        self._chats.close()
+        while not self._log_queue.empty():
+            await self.flush_logs()
+        await self.flush_download_counts()
+    
+    def _notify_shards(self, *event):
+        """Send a cache invalidation to every other worker process"""
+        for peer in self._peers:
+            peer.put(event)
+    
+    def apply_shard_event(self, event: tuple):
+        """Apply a cache invalidation sent by another worker's _notify_shards"""
+        kind = event[0]
+        if kind == 'movie_added':
+            _, movie_id, title = event
+            if self.title_index is not None:
+                self.title_index.insert(title, movie_id, 0)
+            self._search_cache.clear()
+        elif kind == 'verified':
+            self.verification_system.invalidate_user_status(event[1])
+    
+    async def _search_cached(self, query: str) -> list:
+        """Search results for query, shared across equivalent queries for a short time"""
+        query = _normalize_query(query)
+        key = _search_cache_key(query)
+        
+        cached = self._search_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        # The trie is only read and mutated on the event loop thread; the worker gets the IDs
+        movie_ids = self._title_lookup(query)
+        movies = await run_in_app_context(self.app, self._find_movies, query, movie_ids)
+        
+        self._search_cache.set(key, movies)
+        return movies
+    
+    async def refresh_title_index(self, context: ContextTypes.DEFAULT_TYPE):
+        """Periodically rebuild the title trie to pick up download counts and removals"""
+        try:
+            self.title_index = await run_in_app_context(self.app, self._build_title_index)
+        except Exception as e:
+            logger.error(f"Error refreshing title index: {e}")
+    
+    def search_movies(self, query: str, limit: int = 10):
+        """Search active movies by title, most relevant first
+        
+        Uses the GIN-indexed search_vector on PostgreSQL; other databases
+        (e.g. SQLite in tests) fall back to an ILIKE scan. Returns
+        (id, title, year, quality) rows rather than ORM objects.
+        """
+        stmt = db.select(*_RESULT_COLUMNS).where(Movie.is_active == True)
+        
+        if self.use_fulltext_search:
+            stmt = stmt.where(
+                db.text("search_vector @@ websearch_to_tsquery('simple', :q)")
+            ).order_by(
+                db.text("ts_rank_cd(search_vector, websearch_to_tsquery('simple', :q)) DESC"),
+                Movie.download_count.desc()
+            )
+            return db.session.execute(stmt.limit(limit), {'q': query}).all()
+        
+        stmt = stmt.where(
+            Movie.title.ilike(f'%{query}%')
+        ).order_by(
+            Movie.download_count.desc()
+        )
+        return db.session.execute(stmt.limit(limit)).all()
+    
+    def _title_lookup(self, query: str) -> list:
+        """Movie IDs from the title trie: prefix hits, then a typo-tolerant walk
+        
+        Runs on the event loop thread, where handle_file_upload also inserts,
+        so a search never walks the trie while it is being changed.
+        """
+        if self.title_index is None:
+            return []
+        movie_ids = self.title_index.search_prefix(query, limit=10)
+        if len(movie_ids) < self.FUZZY_FALLBACK_RESULTS and len(query) >= self.FUZZY_MIN_QUERY_LENGTH:
+            max_distance = 1 if len(query) < 8 else 2
+            for movie_id in self.title_index.search_fuzzy(query, max_distance=max_distance, limit=10):
+                if movie_id not in movie_ids and len(movie_ids) < 10:
+                    movie_ids.append(movie_id)
+        return movie_ids
+    
+    # Blocking database work below runs through run_in_app_context, off the event loop
+    
+    def _save_user(self, user_id: int, username: str, first_name: str, last_name: str):
+        """Create or refresh a user's profile row with a single upsert"""
+        insert = pg_insert if db.engine.dialect.name == 'postgresql' else sqlite_insert
+        now = datetime.utcnow()
+        profile = {
+            'username': username,
+            'first_name': first_name,
+            'last_name': last_name,
+            'last_active': now
+        }
+        
+        stmt = insert(User).values(user_id=user_id, **profile).on_conflict_do_update(
+            index_elements=['user_id'],
+            set_=profile
+        )
+        db.session.execute(stmt)
+        db.session.commit()
+    
+    def _save_logs(self, batch: list):
+        """Insert a batch of log rows with a single commit"""
+        db.session.bulk_save_objects(batch)
+        db.session.commit()
+    
+    def _find_movies(self, query: str, movie_ids: list) -> list:
+        """Search movies and return (id, title, year, quality) rows
+        
+        movie_ids are the title trie hits for query; the database is
+        searched on a miss.
+        """
+        if not movie_ids:
+            return self.search_movies(query)
+        
+        found = {
+            row.id: row
+            for row in db.session.execute(
+                db.select(*_RESULT_COLUMNS).where(Movie.id.in_(movie_ids), Movie.is_active == True)
+            )
+        }
+        return [found[movie_id] for movie_id in movie_ids if movie_id in found]
+    
+    def _get_movie(self, movie_id: int, active_only: bool = False):
+        """Load a movie snapshot by ID, or None"""
+        filters_by = {'id': movie_id}
+        if active_only:
+            filters_by['is_active'] = True
+        movie = Movie.query.filter_by(**filters_by).first()
+        return _movie_snapshot(movie) if movie else None
+    
+    def _apply_download_counts(self, counts: Counter):
+        """Add batched download counts with one executemany UPDATE
+        
+        Rows are updated in movie_id order so concurrent flushes from other
+        workers lock them in the same order.
+        """
+        movies = Movie.__table__
+        stmt = db.update(movies).where(
+            movies.c.id == db.bindparam('movie_id')
+        ).values(download_count=movies.c.download_count + db.bindparam('added'))
+        db.session.execute(stmt, [
+            {'movie_id': movie_id, 'added': counts[movie_id]} for movie_id in sorted(counts)
+        ])
+        db.session.commit()
+    
+    def _save_movie(self, **fields) -> SimpleNamespace:
+        """Insert an uploaded movie and return its snapshot"""
+        movie = Movie(**fields)
+        db.session.add(movie)
+        db.session.commit()
+        return _movie_snapshot(movie)
+    
+    def _get_user_activity(self, user_id: int) -> tuple:
+        """Return (join_date or None, download count, search count) for a user"""
+        db_user = User.query.filter_by(user_id=user_id).first()
+        downloads = DownloadLog.query.filter_by(user_id=user_id).count()
+        searches = SearchLog.query.filter_by(user_id=user_id).count()
+        return (db_user.join_date if db_user else None), downloads, searches
+    
+    def _get_admin_counts(self) -> tuple:
+        """Return (total users, active movies, total downloads)"""
+        total_users = User.query.count()
+        total_movies = Movie.query.filter_by(is_active=True).count()
+        total_downloads = DownloadLog.query.count()
+        return total_users, total_movies, total_downloads
     
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /start command"""
@@ -51,23 +399,9 @@ class AutoFilterBot:
         message = update.message
         
         # Save user info
-        with self.app.app_context():
-            db_user = User.query.filter_by(user_id=user.id).first()
-            if not db_user:
-                db_user = User(
-                    user_id=user.id,
-                    username=user.username,
-                    first_name=user.first_name,
-                    last_name=user.last_name
-                )
-                db.session.add(db_user)
-            else:
-                db_user.username = user.username
-                db_user.first_name = user.first_name
-                db_user.last_name = user.last_name
-                db_user.last_active = datetime.utcnow()
-            
-            db.session.commit()
+        await run_in_app_context(
+            self.app, self._save_user, user.id, user.username, user.first_name, user.last_name
+        )
         
         # Check if this is verification callback
         if context.args and context.args[0].startswith('verify_'):
@@ -76,16 +410,10 @@ class AutoFilterBot:
             return
         
         # Regular start message
-        keyboard = [
-            [InlineKeyboardButton("🎬 Search Movies", callback_data="search_help")],
-            [InlineKeyboardButton("📊 My Stats", callback_data="user_stats")],
-            [InlineKeyboardButton("ℹ️ Help", callback_data="help")]
-        ]
-        
-        if user.id in Config.ADMIN_IDS:
-            keyboard.append([InlineKeyboardButton("🔐 Admin Panel", callback_data="admin_panel")])
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        if user.id in Config.ADMIN_ID_SET:
+            reply_markup = self._start_kb_admin
+        else:
+            reply_markup = self._start_kb_user
         
         await message.reply_text(
             f"🎬 **Welcome to Auto Filter Movie Bot!**\n\n"
@@ -117,24 +445,14 @@ class AutoFilterBot:
             return
         
         # Search movies in database
-        with self.app.app_context():
-            # Log search query
-            search_log = SearchLog(
-                user_id=user.id,
-                query=query
-            )
-            
-            # Search movies
-            movies = Movie.query.filter(
-                Movie.is_active == True,
-                Movie.title.ilike(f'%{query}%')
-            ).order_by(
-                Movie.download_count.desc()
-            ).limit(10).all()
-            
-            search_log.results_count = len(movies)
-            db.session.add(search_log)
-            db.session.commit()
+        movies = await self._search_cached(query)
+        
+        # Log search query; written in the next batch flush
+        self._log_queue.put_nowait(SearchLog(
+            user_id=user.id,
+            query=query[:self.SEARCH_LOG_MAX_QUERY],
+            results_count=len(movies)
+        ))
         
         if not movies:
             await update.message.reply_text(
@@ -201,7 +519,7 @@ class AutoFilterBot:
         elif data == 'help':
             await self.show_help(query)
         
-        elif data == 'admin_panel' and user.id in Config.ADMIN_IDS:
+        elif data == 'admin_panel' and user.id in Config.ADMIN_ID_SET:
             await self.show_admin_panel(query)
         
         else:
@@ -209,100 +527,95 @@ class AutoFilterBot:
     
     async def handle_download_request(self, query, user, movie_id: int, context):
         """Handle download request with verification check"""
-        with self.app.app_context():
-            # Get movie details
-            movie = Movie.query.filter_by(id=movie_id, is_active=True).first()
-            
-            if not movie:
-                await query.edit_message_text("❌ Movie not found या removed हो गई है।")
-                return
+        # Get movie details
+        movie = await run_in_app_context(self.app, self._get_movie, movie_id, True)
+        
+        if not movie:
+            await query.edit_message_text("❌ Movie not found या removed हो गई है।")
+            return
+        
+        # Check user verification status
+        verification_status = await self.verification_system.check_user_verification_status(user.id)
+        
+        if verification_status['needs_verification']:
+            # Create verification request
+            verification_data = await self.verification_system.create_verification_request(user.id, movie_id)
             
-            # Check user verification status
-            verification_status = await self.verification_system.check_user_verification_status(user.id)
+            fields = _movie_fields(movie)
+            fields['short_url'] = verification_data['short_url']
+            await query.edit_message_text(
+                _VERIFICATION_REQUIRED_TMPL.format_map(fields),
+                parse_mode='Markdown'
+            )
             
-            if verification_status['needs_verification']:
-                # Create verification request
-                verification_data = await self.verification_system.create_verification_request(user.id, movie_id)
-                
-                await query.edit_message_text(
-                    f"🎬 **{movie.title}**\n"
-                    f"📅 Year: {movie.year or 'N/A'}\n"
-                    f"🎯 Quality: {movie.quality or 'HD'}\n"
-                    f"📁 Size: {format_file_size(movie.file_size)}\n\n"
-                    f"⚠️ **Daily Verification Required**\n\n"
-                    f"📋 आपको daily verification complete करना होगा:\n\n"
-                    f"1️⃣ नीचे दिए गए link पर click करें\n"
-                    f"2️⃣ Page load होने तक wait करें (5-10 seconds)\n"
-                    f"3️⃣ Verification complete होने पर bot में वापस आएं\n\n"
-                    f"🔗 **Verification Link:**\n{verification_data['short_url']}\n\n"
-                    f"⏰ Link valid है 24 hours के लिए\n"
-                    f"✅ एक बार verify करने पर 24 hours तक सभी movies free access",
-                    parse_mode='Markdown'
-                )
-                
-                logger.info(f"Verification required for user {user.id}, movie {movie_id}")
+            logger.info(f"Verification required for user {user.id}, movie {movie_id}")
             
-            else:
-                # User is already verified, send file directly
-                await self.send_movie_file(query, user, movie, context)
+        else:
+            # User is already verified, send file directly
+            await self.send_movie_file(query, user, movie, context)
     
     async def handle_verification_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE, verification_token: str):
         """Handle verification callback when user comes from shortened URL"""
         user = update.effective_user
         
-        with self.app.app_context():
-            verification_result = await self.verification_system.verify_user_by_token(verification_token)
+        verification_result = await self.verification_system.verify_user_by_token(verification_token)
+        
+        if verification_result['success']:
+            self._notify_shards('verified', verification_result['user_id'])
+            # Get movie and send file
+            movie = await run_in_app_context(self.app, self._get_movie, verification_result['movie_id'])
             
-            if verification_result['success']:
-                # Get movie and send file
-                movie = Movie.query.filter_by(id=verification_result['movie_id']).first()
+            if movie:
+                await update.message.reply_text(
+                    f"✅ **Verification Successful!**\n\n"
+                    f"🎊 आपका daily verification complete हो गया!\n"
+                    f"⏰ अगले 24 hours तक सभी movies free access\n\n"
+                    f"📤 आपकी requested movie भेजी जा रही है..."
+                )
                 
-                if movie:
-                    await update.message.reply_text(
-                        f"✅ **Verification Successful!**\n\n"
-                        f"🎊 आपका daily verification complete हो गया!\n"
-                        f"⏰ अगले 24 hours तक सभी movies free access\n\n"
-                        f"📤 आपकी requested movie भेजी जा रही है..."
-                    )
-                    
-                    # Send the movie file
-                    await self.send_movie_file_direct(update, user, movie, context)
-                else:
-                    await update.message.reply_text("❌ Movie not found. कृपया दोबारा search करें।")
-            
+                # Send the movie file
+                await self.send_movie_file_direct(update, user, movie, context)
             else:
-                await update.message.reply_text(verification_result['message'])
+                await update.message.reply_text("❌ Movie not found. कृपया दोबारा search करें।")
+                
+        else:
+            await update.message.reply_text(verification_result['message'])
         
         logger.info(f"Verification callback handled for user {user.id}")
     
+    async def _record_download(self, user_id: int, movie):
+        """Queue the download log row and count; both are written by periodic flushes"""
+        self._log_queue.put_nowait(DownloadLog(
+            user_id=user_id,
+            movie_id=movie.id,
+            auto_delete_time=datetime.utcnow() + _AUTO_DELETE_DELTA
+        ))
+        self._pending_downloads[movie.id] += 1
+    
+    async def _deliver_movie(self, user_id: int, movie, context, caption_tmpl: str):
+        """Send the movie file to the user's DM and schedule its auto-delete notice"""
+        await context.bot.send_document(
+            chat_id=user_id,
+            document=movie.file_id,
+            caption=caption_tmpl.format_map(_movie_fields(movie)),
+            parse_mode='Markdown'
+        )
+        
+        context.job_queue.run_once(
+            self.auto_delete_file,
+            when=_AUTO_DELETE_DELTA,
+            data={'user_id': user_id, 'movie_title': movie.title},
+            name=f"delete_{user_id}_{movie.id}_{time.monotonic_ns()}"
+        )
+    
     async def send_movie_file(self, query, user, movie, context):
         """Send movie file to verified user"""
         try:
-            with self.app.app_context():
-                # Log download
-                download_log = DownloadLog(
-                    user_id=user.id,
-                    movie_id=movie.id,
-                    auto_delete_time=datetime.utcnow() + timedelta(minutes=Config.AUTO_DELETE_MINUTES)
-                )
-                db.session.add(download_log)
-                
-                # Increment download count
-                movie.download_count += 1
-                db.session.commit()
+            await self._record_download(user.id, movie)
             
             # Try sending to DM
             try:
-                await context.bot.send_document(
-                    chat_id=user.id,
-                    document=movie.file_id,
-                    caption=f"🎬 **{movie.title}**\n"
-                           f"📅 Year: {movie.year or 'N/A'}\n"
-                           f"🎯 Quality: {movie.quality or 'HD'}\n"
-                           f"📁 Size: {format_file_size(movie.file_size)}\n\n"
-                           f"⏰ File will auto-delete in {Config.AUTO_DELETE_MINUTES} minutes",
-                    parse_mode='Markdown'
-                )
+                await self._deliver_movie(user.id, movie, context, _FILE_CAPTION_TMPL)
                 
                 await query.edit_message_text(
                     f"✅ **{movie.title}** भेज दी गई!\n\n"
@@ -310,14 +623,6 @@ class AutoFilterBot:
                     f"⏰ File {Config.AUTO_DELETE_MINUTES} minutes में auto-delete हो जाएगी"
                 )
                 
-                # Schedule auto-delete
-                context.job_queue.run_once(
-                    self.auto_delete_file,
-                    when=timedelta(minutes=Config.AUTO_DELETE_MINUTES),
-                    data={'user_id': user.id, 'movie_title': movie.title},
-                    name=f"delete_{user.id}_{movie.id}_{datetime.now().timestamp()}"
-                )
-                
             except Exception as dm_error:
                 # If DM fails, send in group
                 await query.edit_message_text(
@@ -332,38 +637,8 @@ class AutoFilterBot:
     async def send_movie_file_direct(self, update: Update, user, movie, context):
         """Send movie file directly from start command"""
         try:
-            with self.app.app_context():
-                # Log download
-                download_log = DownloadLog(
-                    user_id=user.id,
-                    movie_id=movie.id,
-                    auto_delete_time=datetime.utcnow() + timedelta(minutes=Config.AUTO_DELETE_MINUTES)
-                )
-                db.session.add(download_log)
-                
-                # Increment download count
-                movie.download_count += 1
-                db.session.commit()
-            
-            await context.bot.send_document(
-                chat_id=user.id,
-                document=movie.file_id,
-                caption=f"🎬 **{movie.title}**\n"
-                       f"📅 Year: {movie.year or 'N/A'}\n"
-                       f"🎯 Quality: {movie.quality or 'HD'}\n"
-                       f"📁 Size: {format_file_size(movie.file_size)}\n\n"
-                       f"✅ Verification successful!\n"
-                       f"⏰ File will auto-delete in {Config.AUTO_DELETE_MINUTES} minutes",
-                parse_mode='Markdown'
-            )
-            
-            # Schedule auto-delete
-            context.job_queue.run_once(
-                self.auto_delete_file,
-                when=timedelta(minutes=Config.AUTO_DELETE_MINUTES),
-                data={'user_id': user.id, 'movie_title': movie.title},
-                name=f"delete_{user.id}_{movie.id}_{datetime.now().timestamp()}"
-            )
+            await self._record_download(user.id, movie)
+            await self._deliver_movie(user.id, movie, context, _VERIFIED_FILE_CAPTION_TMPL)
             
         except Exception as e:
             logger.error(f"Error sending movie file direct: {e}")
@@ -392,7 +667,7 @@ class AutoFilterBot:
         """Handle /upload command for admins"""
         user = update.effective_user
         
-        if user.id not in Config.ADMIN_IDS:
+        if user.id not in Config.ADMIN_ID_SET:
             await update.message.reply_text("❌ Admin access required.")
             return
         
@@ -409,7 +684,7 @@ class AutoFilterBot:
         """Handle file uploads from admins"""
         user = update.effective_user
         
-        if user.id not in Config.ADMIN_IDS:
+        if user.id not in Config.ADMIN_ID_SET:
             await update.message.reply_text("❌ Admin access required.")
             return
         
@@ -429,34 +704,35 @@ class AutoFilterBot:
             )
             return
         
-        with self.app.app_context():
-            # Create movie entry
-            movie = Movie(
-                title=movie_data['title'],
-                year=movie_data.get('year'),
-                quality=movie_data.get('quality', 'HD'),
-                language=movie_data.get('language', 'Hindi'),
-                file_id=file_obj.file_id,
-                file_name=file_obj.file_name or movie_data['title'],
-                file_size=file_obj.file_size or 0,
-                file_type='video' if update.message.video else 'document',
-                uploaded_by=user.id
-            )
-            
-            db.session.add(movie)
-            db.session.commit()
-            
-            await update.message.reply_text(
-                f"✅ **Movie Uploaded Successfully!**\n\n"
-                f"🎬 Title: {movie.title}\n"
-                f"📅 Year: {movie.year or 'N/A'}\n"
-                f"🎯 Quality: {movie.quality}\n"
-                f"🗣️ Language: {movie.language}\n"
-                f"📁 Size: {format_file_size(movie.file_size)}\n"
-                f"🆔 Movie ID: {movie.id}"
-            )
-            
-            logger.info(f"Admin {user.id} uploaded movie: {movie.title}")
+        # Create movie entry
+        movie = await run_in_app_context(
+            self.app, self._save_movie,
+            title=movie_data['title'],
+            year=movie_data.get('year'),
+            quality=movie_data.get('quality', 'HD'),
+            language=movie_data.get('language', 'Hindi'),
+            file_id=file_obj.file_id,
+            file_name=file_obj.file_name or movie_data['title'],
+            file_size=file_obj.file_size or 0,
+            file_type='video' if update.message.video else 'document',
+            uploaded_by=user.id
+        )
+        if self.title_index is not None:
+            self.title_index.insert(movie.title, movie.id, 0)
+        self._search_cache.clear()
+        self._notify_shards('movie_added', movie.id, movie.title)
+        
+        await update.message.reply_text(
+            f"✅ **Movie Uploaded Successfully!**\n\n"
+            f"🎬 Title: {movie.title}\n"
+            f"📅 Year: {movie.year or 'N/A'}\n"
+            f"🎯 Quality: {movie.quality}\n"
+            f"🗣️ Language: {movie.language}\n"
+            f"📁 Size: {format_file_size(movie.file_size)}\n"
+            f"🆔 Movie ID: {movie.id}"
+        )
+        
+        logger.info(f"Admin {user.id} uploaded movie: {movie.title}")
     
     async def show_search_help(self, query):
         """Show search help"""
@@ -479,29 +755,28 @@ class AutoFilterBot:
     
     async def show_user_stats(self, query, user):
         """Show user statistics"""
-        with self.app.app_context():
-            db_user = User.query.filter_by(user_id=user.id).first()
-            downloads = DownloadLog.query.filter_by(user_id=user.id).count()
-            searches = SearchLog.query.filter_by(user_id=user.id).count()
-            
-            verification_status = await self.verification_system.check_user_verification_status(user.id)
-            
-            status_text = "✅ Verified" if not verification_status['needs_verification'] else "❌ Need Verification"
-            hours_remaining = verification_status.get('hours_remaining', 0)
-            
-            await query.edit_message_text(
-                f"📊 **Your Stats**\n\n"
-                f"👤 User: {user.first_name}\n"
-                f"🆔 ID: {user.id}\n"
-                f"📅 Joined: {db_user.join_date.strftime('%d/%m/%Y') if db_user else 'Today'}\n\n"
-                f"📈 **Activity:**\n"
-                f"🔍 Searches: {searches}\n"
-                f"📥 Downloads: {downloads}\n\n"
-                f"🛡️ **Verification Status:**\n"
-                f"Status: {status_text}\n"
-                f"⏰ Hours Remaining: {hours_remaining}\n\n"
-                f"💡 Daily verification gives you 24-hour access to all movies!"
-            )
+        join_date, downloads, searches = await run_in_app_context(
+            self.app, self._get_user_activity, user.id
+        )
+        
+        verification_status = await self.verification_system.check_user_verification_status(user.id)
+        
+        status_text = "✅ Verified" if not verification_status['needs_verification'] else "❌ Need Verification"
+        hours_remaining = verification_status.get('hours_remaining', 0)
+        
+        await query.edit_message_text(
+            f"📊 **Your Stats**\n\n"
+            f"👤 User: {user.first_name}\n"
+            f"🆔 ID: {user.id}\n"
+            f"📅 Joined: {join_date.strftime('%d/%m/%Y') if join_date else 'Today'}\n\n"
+            f"📈 **Activity:**\n"
+            f"🔍 Searches: {searches}\n"
+            f"📥 Downloads: {downloads}\n\n"
+            f"🛡️ **Verification Status:**\n"
+            f"Status: {status_text}\n"
+            f"⏰ Hours Remaining: {hours_remaining}\n\n"
+            f"💡 Daily verification gives you 24-hour access to all movies!"
+        )
     
     async def show_help(self, query):
         """Show help information"""
@@ -527,54 +802,188 @@ class AutoFilterBot:
     
     async def show_admin_panel(self, query):
         """Show admin panel"""
-        with self.app.app_context():
-            total_users = User.query.count()
-            total_movies = Movie.query.filter_by(is_active=True).count()
-            total_downloads = DownloadLog.query.count()
-            verification_stats = await self.verification_system.get_verification_stats()
-            
-            await query.edit_message_text(
-                f"🔐 **Admin Panel**\n\n"
-                f"📊 **Statistics:**\n"
-                f"👥 Total Users: {total_users}\n"
-                f"🎬 Total Movies: {total_movies}\n"
-                f"📥 Total Downloads: {total_downloads}\n\n"
-                f"🛡️ **Verification Stats:**\n"
-                f"✅ Successful: {verification_stats['successful_verifications']}\n"
-                f"⏳ Pending: {verification_stats['pending_verifications']}\n"
-                f"❌ Expired: {verification_stats['expired_verifications']}\n"
-                f"📈 Success Rate: {verification_stats['success_rate']:.1f}%\n\n"
-                f"**Commands:**\n"
-                f"/upload - Upload movies\n"
-                f"/stats - Detailed statistics"
-            )
+        total_users, total_movies, total_downloads = await run_in_app_context(
+            self.app, self._get_admin_counts
+        )
+        verification_stats = await self.verification_system.get_verification_stats()
+        
+        await query.edit_message_text(
+            f"🔐 **Admin Panel**\n\n"
+            f"📊 **Statistics:**\n"
+            f"👥 Total Users: {total_users}\n"
+            f"🎬 Total Movies: {total_movies}\n"
+            f"📥 Total Downloads: {total_downloads}\n\n"
+            f"🛡️ **Verification Stats:**\n"
+            f"✅ Successful: {verification_stats['successful_verifications']}\n"
+            f"⏳ Pending: {verification_stats['pending_verifications']}\n"
+            f"❌ Expired: {verification_stats['expired_verifications']}\n"
+            f"📈 Success Rate: {verification_stats['success_rate']:.1f}%\n\n"
+            f"**Commands:**\n"
+            f"/upload - Upload movies\n"
+            f"/stats - Detailed statistics"
+        )
+
+_ALLOWED_UPDATES = ['message', 'callback_query']
+
+def build_application(bot: AutoFilterBot, polling: bool = True, workers: int = 1) -> Application:
+    """Create the telegram Application with all handlers and jobs registered
+    
+    Sharded workers pass polling=False and are fed updates by the front process;
+    workers is the process count, so each takes an equal slice of the send budget.
+    """
+    builder = (
+        Application.builder()
+        .token(Config.BOT_TOKEN)
+        .rate_limiter(RateLimiter(share=workers))
+        .post_shutdown(bot.shutdown)
+    )
+    if not polling:
+        builder = builder.updater(None)
+    application = builder.build()
+    
+    # Add handlers
+    application.add_handler(CommandHandler("start", bot.per_chat(bot.start_command)))
+    application.add_handler(CommandHandler("upload", bot.upload_command))
+    application.add_handler(MessageHandler(
+        filters.TEXT & ~filters.COMMAND, 
+        bot.per_chat(bot.handle_message)
+    ))
+    application.add_handler(MessageHandler(
+        filters.Document.ALL | filters.VIDEO, 
+        bot.per_chat(bot.handle_file_upload)
+    ))
+    application.add_handler(CallbackQueryHandler(bot.per_chat(bot.handle_callback)))
+    
+    application.job_queue.run_repeating(bot.flush_logs, interval=bot.LOG_FLUSH_INTERVAL)
+    application.job_queue.run_repeating(
+        bot.flush_download_counts, interval=bot.DOWNLOAD_COUNT_FLUSH_INTERVAL
+    )
+    if bot.title_index is not None:
+        application.job_queue.run_repeating(
+            bot.refresh_title_index,
+            interval=bot.TITLE_INDEX_REFRESH_SECONDS,
+            first=bot.TITLE_INDEX_REFRESH_SECONDS
+        )
+    return application
+
+async def _serve_shard(worker_id: int, updates, peers: list):
+    """Process the updates routed to this worker until the front process sends None
+    
+    Tuples on the queue are cache invalidations from other workers (see
+    AutoFilterBot.apply_shard_event); everything else is an update.
+    """
+    bot = AutoFilterBot(init_schema=False, title_index=Config.SHARD_TITLE_INDEX)
+    bot._peers = peers
+    application = build_application(bot, polling=False, workers=len(peers) + 1)
+    
+    async with application:
+        await application.start()
+        logger.info(f"Worker {worker_id} ready")
+        try:
+            while True:
+                data = await asyncio.to_thread(updates.get)
+                if data is None:
+                    break
+                if isinstance(data, tuple):
+                    bot.apply_shard_event(data)
+                    continue
+                await application.update_queue.put(Update.de_json(data, application.bot))
+        finally:
+            await application.stop()
+            await bot.shutdown(application)
+
+def _run_shard(worker_id: int, updates, peers: list):
+    """Worker process entry point"""
+    try:
+        asyncio.run(_serve_shard(worker_id, updates, peers))
+    except KeyboardInterrupt:
+        pass
+
+async def _fan_out_updates(shards: list):
+    """Long-poll Telegram and route each update to the worker owning its chat
+    
+    Only this process calls getUpdates, since Telegram rejects concurrent
+    pollers. Routing by chat_id keeps every chat's updates in one worker, in order.
+    Like Updater.start_polling/stop, any webhook is removed first and the last
+    offset is confirmed on the way out so a restart doesn't replay the final batch.
+    """
+    async with Bot(Config.BOT_TOKEN) as telegram_bot:
+        # getUpdates fails with Conflict while a webhook is set
+        await telegram_bot.delete_webhook()
+        offset = None
+        try:
+            while True:
+                try:
+                    updates = await telegram_bot.get_updates(
+                        offset=offset, timeout=30, read_timeout=40, allowed_updates=_ALLOWED_UPDATES
+                    )
+                except Exception as e:
+                    logger.error(f"Error polling updates: {e}")
+                    await asyncio.sleep(1)
+                    continue
+                
+                for update in updates:
+                    offset = update.update_id + 1
+                    chat = update.effective_chat
+                    shard = chat.id % len(shards) if chat else 0
+                    shards[shard].put(update.to_dict())
+        finally:
+            if offset is not None:
+                try:
+                    await telegram_bot.get_updates(offset=offset, timeout=0, allowed_updates=_ALLOWED_UPDATES)
+                except Exception as e:
+                    logger.error(f"Error confirming update offset {offset}: {e}")
+
+def run_sharded(workers: int):
+    """Run one polling front process and `workers` bot processes sharded by chat"""
+    # Run the schema DDL once here rather than racing it in every worker
+    app = _create_flask_app()
+    with app.app_context():
+        _create_schema()
+        db.engine.dispose()
+    
+    ctx = mp.get_context('spawn')
+    shards = [ctx.Queue() for _ in range(workers)]
+    processes = [
+        ctx.Process(
+            target=_run_shard,
+            args=(worker_id, shard, [peer for peer in shards if peer is not shard]),
+            name=f"bot-worker-{worker_id}"
+        )
+        for worker_id, shard in enumerate(shards)
+    ]
+    for process in processes:
+        process.start()
+    
+    logger.info(f"Starting Auto Filter Movie Bot with {workers} workers...")
+    try:
+        asyncio.run(_fan_out_updates(shards))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for shard in shards:
+            shard.put(None)
+        for process in processes:
+            process.join()
 
 def main():
     """Main function to start the bot"""
     try:
+        workers = Config.BOT_WORKERS or os.cpu_count() or 1
+        if workers > 1:
+            run_sharded(workers)
+            return
+        
         # Initialize bot
         bot = AutoFilterBot()
         
         # Create application
-        application = Application.builder().token(Config.BOT_TOKEN).build()
-        
-        # Add handlers
-        application.add_handler(CommandHandler("start", bot.start_command))
-        application.add_handler(CommandHandler("upload", bot.upload_command))
-        application.add_handler(MessageHandler(
-            filters.TEXT & ~filters.COMMAND, 
-            bot.handle_message
-        ))
-        application.add_handler(MessageHandler(
-            filters.Document.ALL | filters.VIDEO, 
-            bot.handle_file_upload
-        ))
-        application.add_handler(CallbackQueryHandler(bot.handle_callback))
+        application = build_application(bot)
         
         logger.info("Starting Auto Filter Movie Bot...")
         
         # Start the bot
-        application.run_polling(allowed_updates=['message', 'callback_query'])
+        application.run_polling(allowed_updates=_ALLOWED_UPDATES)
         
     except Exception as e:
         logger.error(f"Failed to start bot: {e}")
@@ -1,66 +1,27 @@
 import os
+import asyncio
 import logging
+import sqlite3
+import string
+import time
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
+from telegram.helpers import escape_markdown
 from database import Database
 from config import Config
+from utils import admin_only
 import json
 
 logger = logging.getLogger(__name__)
 
-class BotBlueprintGenerator:
-    """Generate complete bot blueprint for replication"""
-    
-    def __init__(self, database: Database):
-        self.db = database
-    
-    async def generate_complete_blueprint(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Generate complete bot blueprint with one click"""
-        user = update.effective_user
-        
-        if user.id not in Config.ADMIN_IDS:
-            await update.message.reply_text("❌ You are not authorized to generate blueprint.")
-            return
-        
-        try:
-            # Generate comprehensive blueprint
-            blueprint = self._create_complete_blueprint()
-            
-            # Create the response
-            blueprint_text = (
-                f"🤖 **COMPLETE TELEGRAM MOVIE BOT BLUEPRINT**\n\n"
-                f"**📊 Current Stats:**\n"
-                f"• Total Movies: {self._get_movie_count()}\n"
-                f"• Total Users: {self._get_user_count()}\n"
-                f"• Files Processed: {self._get_total_downloads()}\n"
-                f"• Success Rate: 99.8%\n\n"
-                f"**🔧 Bot Features:**\n"
-                f"• Bulk Upload (500+ files)\n"
-                f"• Smart Verification System\n"
-                f"• Admin Chat Support\n"
-                f"• Backup Channel Integration\n"
-                f"• Auto File Management\n"
-                f"• Rate Limit Protection\n\n"
-                f"**📝 REPLICATION PROMPT:**\n\n"
-                f"```\n{blueprint}\n```\n\n"
-                f"**🚀 Usage:** Copy the prompt above and use it in Replit to create identical bots!"
-            )
-            
-            # Send in multiple messages due to length
-            await self._send_long_message(update, blueprint_text)
-            
-        except Exception as e:
-            logger.error(f"Error generating blueprint: {e}")
-            await update.message.reply_text("❌ Error generating blueprint. Please try again.")
-    
-    def _create_complete_blueprint(self):
-        """Create the complete blueprint prompt"""
-        return f"""
+# Replication prompt; $-placeholders are filled from Config once at import
+_BLUEPRINT_TEMPLATE = string.Template("""
 CREATE A PROFESSIONAL TELEGRAM MOVIE BOT
 
 **CORE REQUIREMENTS:**
-1. Admin ID: 8148695660
-2. Backup Channel: https://t.me/+gU0yZrOEFbliNThl
+1. Admin ID: $admin_id
+2. Backup Channel: $backup_channel
 3. Force users to join backup channel before downloads
 4. Bulk upload system (handle 500+ files without bans)
 5. One-time daily verification (24-hour validity)
@@ -72,10 +33,10 @@ CREATE A PROFESSIONAL TELEGRAM MOVIE BOT
 
 **Environment Variables:**
 - BOT_TOKEN: Telegram bot token from @BotFather
-- ADMIN_IDS: 8148695660
+- ADMIN_IDS: $admin_ids
 - INSHORT_API_KEY: URL shortener API key
-- BACKUP_CHANNEL: https://t.me/+gU0yZrOEFbliNThl
-- BACKUP_CHANNEL_ID: @moviebackupchannel
+- BACKUP_CHANNEL: $backup_channel
+- BACKUP_CHANNEL_ID: $backup_channel_id
 
 **Python Dependencies:**
 ```
@@ -294,58 +255,101 @@ FORCE_JOIN_BACKUP = True
 - Complete admin control
 
 This bot handles everything automatically: user management, file distribution, verification tracking, admin support, and fraud prevention. Perfect for large-scale movie distribution with complete security and efficiency.
-"""
+""")
+
+_COMPLETE_BLUEPRINT = _BLUEPRINT_TEMPLATE.substitute(
+    admin_id=Config.ADMIN_IDS[0] if Config.ADMIN_IDS else '',
+    admin_ids=','.join(map(str, Config.ADMIN_IDS)),
+    backup_channel=Config.BACKUP_CHANNEL,
+    backup_channel_id=Config.BACKUP_CHANNEL_ID
+)
+_COMPLETE_BLUEPRINT_BYTES = _COMPLETE_BLUEPRINT.encode('utf-8')
+
+# Document caption, escaped for MarkdownV2 once at import; only the counts vary
+_CAPTION_TEMPLATE = string.Template(
+    f"🤖 *{escape_markdown('COMPLETE TELEGRAM MOVIE BOT BLUEPRINT', version=2)}*\n\n"
+    f"*📊 {escape_markdown('Current Stats:', version=2)}*\n"
+    "• Total Movies: $movies\n"
+    "• Total Users: $users\n"
+    "• Files Processed: $downloads\n"
+    f"• {escape_markdown('Success Rate: 99.8%', version=2)}\n\n"
+    f"*🔧 {escape_markdown('Bot Features:', version=2)}*\n"
+    + escape_markdown(
+        "• Bulk Upload (500+ files)\n"
+        "• Smart Verification System\n"
+        "• Admin Chat Support\n"
+        "• Backup Channel Integration\n"
+        "• Auto File Management\n"
+        "• Rate Limit Protection\n\n",
+        version=2
+    )
+    + f"*🚀 {escape_markdown('Usage:', version=2)}* "
+    + escape_markdown("Copy the prompt in the attached file and use it in Replit to create identical bots!", version=2)
+)
 
-    async def _send_long_message(self, update: Update, text: str):
-        """Send long message in chunks"""
-        max_length = 4000
-        
-        if len(text) <= max_length:
-            await update.message.reply_text(text, parse_mode='Markdown')
+class BotBlueprintGenerator:
+    """Generate complete bot blueprint for replication"""
+    
+    STATS_CACHE_SECONDS = 30
+    
+    # Shared by every blueprint message; markups are immutable
+    _MARKUP = InlineKeyboardMarkup([[InlineKeyboardButton("🔄 Refresh", callback_data="bp_refresh")]])
+    
+    def __init__(self, database: Database):
+        self.db = database
+        self._stats_cache = None  # ((movies, users, downloads), fetched_at monotonic)
+    
+    @admin_only("❌ You are not authorized to generate blueprint.")
+    async def generate_complete_blueprint(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Generate complete bot blueprint with one click"""
+        await self._send_blueprint(update.message)
+    
+    async def handle_blueprint_callback(self, query, context):
+        """Resend the blueprint with freshly loaded stats"""
+        if query.from_user.id not in Config.ADMIN_ID_SET:
+            await query.message.reply_text("❌ You are not authorized to generate blueprint.")
             return
         
-        # Split into chunks
-        chunks = []
-        while text:
-            if len(text) <= max_length:
-                chunks.append(text)
-                break
-            
-            # Find a good break point
-            break_point = text.rfind('\n', 0, max_length)
-            if break_point == -1:
-                break_point = max_length
-            
-            chunks.append(text[:break_point])
-            text = text[break_point:].lstrip()
-        
-        # Send chunks
-        for i, chunk in enumerate(chunks):
-            if i == 0:
-                await update.message.reply_text(chunk, parse_mode='Markdown')
-            else:
-                await update.message.reply_text(chunk, parse_mode='Markdown')
+        self._stats_cache = None
+        await self._send_blueprint(query.message)
     
-    def _get_movie_count(self):
-        """Get total movie count"""
+    async def _send_blueprint(self, message):
+        """Reply to message with the blueprint document and current stats"""
         try:
-            stats = self.db.get_stats()
-            return stats.get('total_movies', 0)
-        except:
-            return 0
-    
-    def _get_user_count(self):
-        """Get total user count"""
-        try:
-            stats = self.db.get_stats()
-            return stats.get('total_users', 0)
-        except:
-            return 0
+            total_movies, total_users, total_downloads = await self._get_stats_cached()
+            
+            # Stats summary goes in the caption, the prompt itself in the attached file
+            caption = _CAPTION_TEMPLATE.substitute(
+                movies=total_movies,
+                users=total_users,
+                downloads=total_downloads
+            )
+            
+            # One document instead of several Markdown-parsed message chunks
+            await message.reply_document(
+                document=_COMPLETE_BLUEPRINT_BYTES,
+                filename='blueprint.md',
+                disable_content_type_detection=True,
+                caption=caption,
+                parse_mode=ParseMode.MARKDOWN_V2,
+                reply_markup=self._MARKUP
+            )
+            
+        except Exception as e:
+            logger.error("Error generating blueprint: %s", e)
+            await message.reply_text("❌ Error generating blueprint. Please try again.")
     
-    def _get_total_downloads(self):
-        """Get total download count"""
+    async def _get_stats_cached(self) -> tuple:
+        """Get (movies, users, downloads), reusing the last result for STATS_CACHE_SECONDS"""
+        now = time.monotonic()
+        if self._stats_cache is not None and now - self._stats_cache[1] < self.STATS_CACHE_SECONDS:
+            return self._stats_cache[0]
+        
         try:
-            stats = self.db.get_stats()
-            return stats.get('total_downloads', 0)
-        except:
-            return 0
\ No newline at end of file
+            stats = await asyncio.to_thread(self.db.get_blueprint_counts)
+        except sqlite3.Error as e:
+            logger.error("Error loading blueprint stats: %s", e)
+            return 0, 0, 0
+        
+        self._stats_cache = (stats, now)
+        return stats
@@ -1,75 +1,217 @@
+import os
 import logging
 import asyncio
+import heapq
+import time
+from collections import Counter
 from datetime import datetime, timedelta
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ChatMember
+from telegram.constants import ChatType
 from telegram.ext import ContextTypes
-from telegram.error import TelegramError
+from telegram.error import TelegramError, Forbidden, BadRequest
 from database import Database
 from config import Config
-from utils import format_file_size, parse_upload_caption, fuzzy_search_movies
+from utils import format_file_size, parse_upload_caption, fuzzy_search_movies, TTLMap, ChatSerializer
 
 from file_manager import FileManager
 from admin_panel import AdminPanel
 from bulk_upload_handler import BulkUploadHandler
 from bot_structure_viewer import BotStructureViewer
 from admin_chat_system import AdminChatSystem
+from url_shortener import URLShortener
 
 from bot_blueprint_generator import BotBlueprintGenerator
 
 logger = logging.getLogger(__name__)
 
+_STATS_TMPL = """
+📊 **Bot Statistics**
+
+🎬 **Movies:** {total_movies}
+⬇️ **Downloads:** {total_downloads}
+🔍 **Searches:** {total_searches}
+👥 **Unique Users:** {unique_users}
+
+🔥 **Popular Movies:**
+"""
+
 class BotHandlers:
     """Main bot handlers class"""
     
+    MEMBERSHIP_CACHE_SECONDS = 300
+    MEMBERSHIP_NEGATIVE_CACHE_SECONDS = 30  # short, so users can retry right after joining
+    MEMBERSHIP_CACHE_MAX_USERS = 100000
+    CHAT_WORKER_IDLE_SECONDS = 300  # a chat's worker exits after this long without updates
+    LOG_FLUSH_INTERVAL = 0.2  # seconds between batched log writes
+    LOG_FLUSH_MAX_ROWS = 500  # flush early once this many rows are buffered
+    DM_BLOCKED_CACHE_SECONDS = 3600  # skip DM attempts this long after one is refused
+    DM_BLOCKED_CACHE_MAX_USERS = 200000
+    
     def __init__(self, database: Database):
         self.db = database
+        self._membership_cache = TTLMap(self.MEMBERSHIP_CACHE_MAX_USERS, self.MEMBERSHIP_CACHE_SECONDS)
+        self._dm_blocked = TTLMap(self.DM_BLOCKED_CACHE_MAX_USERS, self.DM_BLOCKED_CACHE_SECONDS)  # users the bot cannot DM
+        self._chats = ChatSerializer(self.CHAT_WORKER_IDLE_SECONDS)
+        
+        # Log rows and download counts buffered until the next flush_logs
+        self._pending_messages = []
+        self._pending_searches = []
+        self._pending_downloads = []
+        self._pending_download_counts = Counter()
+        self._early_flush = None
+        self._background_tasks: set = set()
+        
+        # Pending auto-delete notices as (deadline monotonic, user_id, movie_id, title),
+        # served by one _delete_loop task instead of a job per download
+        self._delete_heap = []
+        self._delete_wakeup = asyncio.Event()
+        self._delete_task = None
+        
+        # Both inputs are fixed at startup, so format once
+        self._welcome_msg = Config.WELCOME_MESSAGE.format(BACKUP_CHANNEL=Config.BACKUP_CHANNEL)
+        self._backup_prompt_markup = InlineKeyboardMarkup([
+            [InlineKeyboardButton("🔗 Join Backup Channel", url=Config.BACKUP_CHANNEL)],
+            [InlineKeyboardButton("✅ I Joined - Continue", callback_data="check_backup_join")]
+        ])
 
         self.file_manager = FileManager()
+        self.url_shortener = URLShortener()
         self.admin_panel = AdminPanel(database)
-        self.bulk_handler = BulkUploadHandler(database)
+        self.bulk_handler = BulkUploadHandler(database, self.url_shortener)
         self.structure_viewer = BotStructureViewer(database)
         self.admin_chat = AdminChatSystem(database)
         self.blueprint_generator = BotBlueprintGenerator(database)
         
+        self._build_callback_routes()
+        
         # Validate configuration on startup
         Config.validate_config()
     
+    def schedule_log_flush(self, job_queue):
+        """Register the periodic batched log write on the application's job queue"""
+        job_queue.run_repeating(
+            self.flush_logs,
+            interval=self.LOG_FLUSH_INTERVAL,
+            first=self.LOG_FLUSH_INTERVAL,
+            name="flush_logs"
+        )
+    
+    async def flush_logs(self, context: ContextTypes.DEFAULT_TYPE = None):
+        """Write the log rows and download counts gathered since the last flush in one transaction"""
+        if not (self._pending_messages or self._pending_searches or self._pending_downloads):
+            return
+        
+        messages, self._pending_messages = self._pending_messages, []
+        searches, self._pending_searches = self._pending_searches, []
+        downloads, self._pending_downloads = self._pending_downloads, []
+        counts, self._pending_download_counts = self._pending_download_counts, Counter()
+        
+        try:
+            await self.db.run(self.db.write_log_batch, messages, searches, downloads, counts)
+        except Exception as e:
+            logger.error(f"Error writing {len(messages) + len(searches) + len(downloads)} log rows: {e}")
+    
+    async def shutdown(self, application):
+        """Stop chat workers, write out buffered logs and close HTTP sessions before the application exits"""
+        self._chats.close()
+        if self._delete_task is not None:
+            self._delete_task.cancel()
+        await self.flush_logs()
+        await self.url_shortener.close()
+    
+    def _buffer_log(self, rows: list, row: tuple):
+        """Buffer a log row, flushing early if the batch has grown large"""
+        rows.append(row)
+        pending = len(self._pending_messages) + len(self._pending_searches) + len(self._pending_downloads)
+        if pending >= self.LOG_FLUSH_MAX_ROWS and (self._early_flush is None or self._early_flush.done()):
+            self._early_flush = asyncio.create_task(self.flush_logs())
+    
+    def _record_download(self, user, movie_id: int):
+        """Buffer a download log row and count for the next flush"""
+        auto_delete_date = datetime.now() + timedelta(minutes=Config.AUTO_DELETE_MINUTES)
+        self._pending_download_counts[movie_id] += 1
+        self._buffer_log(self._pending_downloads, (user.id, user.username or "", movie_id, auto_delete_date))
+    
+    def _build_callback_routes(self):
+        """Build the callback_data dispatch tables used by handle_callback
+
+        _cb_exact maps full callback_data to handler(update, context).
+        _cb_prefix maps the text before the first "_" to (rest of prefix,
+        handler(update, arg, context)), where arg is whatever follows the prefix.
+        """
+        admin = self.admin_panel
+        self._cb_exact = {
+            "admin_movie_ads": admin.show_movie_advertisements,
+            "admin_user_messages": admin.show_user_messages,
+            "admin_movie_requests": admin.show_movie_requests,
+            "admin_reset_verifications": admin.reset_all_verifications,
+            "admin_confirm_reset": admin.confirm_reset_verifications,
+            "admin_back": admin.show_admin_panel,
+            "bp_refresh": lambda update, context: self.blueprint_generator.handle_blueprint_callback(
+                update.callback_query, context),
+        }
+        self._cb_prefix = {
+            "download": ("", lambda update, arg, context: self._handle_download_request(
+                update.callback_query, update.callback_query.from_user, int(arg), context)),
+            "request": ("movie_", lambda update, arg, context: self._handle_movie_request(
+                update.callback_query, update.callback_query.from_user, arg, context)),
+            "admin": ("advertise_", lambda update, arg, context: admin.advertise_movie(
+                update, context, int(arg))),
+            "structure": ("", lambda update, arg, context: self.structure_viewer.handle_structure_callback(
+                update.callback_query, context)),
+            "adminchat": ("", lambda update, arg, context: self.admin_chat.handle_admin_chat_callback(
+                update.callback_query, context)),
+            # Auto verification system में यह feature नहीं है
+            "verify": ("complete_", lambda update, arg, context: update.callback_query.edit_message_text(
+                "❌ इस feature की जरूरत नहीं है auto system में।")),
+            # Verification system removed
+            "verification": ("help_", lambda update, arg, context: update.callback_query.edit_message_text(
+                "❌ वेरिफिकेशन सिस्टम हटा दिया गया है।")),
+        }
+    
+    def per_chat(self, handler):
+        """Wrap a handler so its updates run in order per chat but concurrently across chats"""
+        return self._chats.wrap(handler)
+    
     async def check_backup_channel_membership(self, user_id: int, context: ContextTypes.DEFAULT_TYPE) -> bool:
         """Check if user is member of backup channel"""
         if not Config.FORCE_JOIN_BACKUP:
             return True
             
+        cached = self._membership_cache.get(user_id)
+        if cached is not None:
+            return cached
+        
         try:
             member = await context.bot.get_chat_member(Config.BACKUP_CHANNEL_ID, user_id)
-            return member.status in [ChatMember.MEMBER, ChatMember.ADMINISTRATOR, ChatMember.OWNER]
+            is_member = member.status in [ChatMember.MEMBER, ChatMember.ADMINISTRATOR, ChatMember.OWNER]
         except Exception as e:
             logger.warning(f"Could not check backup channel membership for {user_id}: {e}")
             return True  # Allow access if we can't check
+        
+        ttl = self.MEMBERSHIP_CACHE_SECONDS if is_member else self.MEMBERSHIP_NEGATIVE_CACHE_SECONDS
+        self._membership_cache.set(user_id, is_member, ttl=ttl)
+        return is_member
     
     async def show_backup_channel_prompt(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Show backup channel join prompt"""
-        keyboard = [
-            [InlineKeyboardButton("🔗 Join Backup Channel", url=Config.BACKUP_CHANNEL)],
-            [InlineKeyboardButton("✅ I Joined - Continue", callback_data="check_backup_join")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
         await update.message.reply_text(
             "🚨 **Join Our Backup Channel**\n\n"
             "To use this bot, please join our backup channel first.\n"
             "This ensures you get updates if the main bot goes down!\n\n"
             "👆 Click the button above to join, then click 'I Joined'",
-            reply_markup=reply_markup,
+            reply_markup=self._backup_prompt_markup,
             parse_mode='Markdown'
         )
 
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /start command with auto-verification status check"""
         user = update.effective_user
+        self._clear_dm_blocked(update)
         
         try:
             # Auto-save user information to database
-            self.db.save_user_info(user.id, user.username or "", user.first_name or "")
+            await self.db.run(self.db.save_user_info, user.id, user.username or "", user.first_name or "")
             
             # Check backup channel membership first (except for admins)
             if user.id not in Config.ADMIN_IDS:
@@ -83,17 +225,13 @@ class BotHandlers:
                 arg = context.args[0]
                 logger.info(f"Start command with argument: {arg} from user {user.id}")
                 
-                if arg.startswith("download_") or arg.startswith("get_"):
-                    file_id = arg.replace("download_", "").replace("get_", "")
+                prefix, _, file_id = arg.partition("_")
+                if prefix in ("download", "get") and file_id:
+                    # Strip only the prefix; file_ids may themselves contain "get_"
                     logger.info(f"Processing download request for file_id: {file_id}")
                     
                     # Find movie by file_id
-                    movies = self.db.search_movies("", limit=1000)
-                    movie = None
-                    for m in movies:
-                        if m['file_id'] == file_id:
-                            movie = m
-                            break
+                    movie = await self.db.run(self.db.get_movie_by_file_id, file_id)
                     
                     if movie:
                         logger.info(f"Movie found: {movie['title']} - sending file to user {user.id}")
@@ -112,9 +250,8 @@ class BotHandlers:
                     parse_mode='Markdown'
                 )
             else:
-                welcome_msg = Config.WELCOME_MESSAGE.format(BACKUP_CHANNEL=Config.BACKUP_CHANNEL)
                 await update.message.reply_text(
-                    welcome_msg,
+                    self._welcome_msg,
                     parse_mode='Markdown'
                 )
                 
@@ -190,21 +327,12 @@ class BotHandlers:
             return
         
         try:
-            stats = self.db.get_stats()
-            
-            stats_message = f"""
-📊 **Bot Statistics**
-
-🎬 **Movies:** {stats['total_movies']}
-⬇️ **Downloads:** {stats['total_downloads']}
-🔍 **Searches:** {stats['total_searches']}
-👥 **Unique Users:** {stats['unique_users']}
-
-🔥 **Popular Movies:**
-"""
+            stats = await self.db.run(self.db.get_stats)
             
-            for i, movie in enumerate(stats['popular_movies'], 1):
-                stats_message += f"{i}. {movie['title']} ({movie['download_count']} downloads)\n"
+            stats_message = _STATS_TMPL.format_map(stats) + "".join(
+                f"{i}. {movie['title']} ({movie['download_count']} downloads)\n"
+                for i, movie in enumerate(stats['popular_movies'], 1)
+            )
             
             await update.message.reply_text(stats_message, parse_mode='Markdown')
             
@@ -218,9 +346,10 @@ class BotHandlers:
         """Handle text messages (search queries)"""
         user = update.effective_user
         query = update.message.text.strip()
+        self._clear_dm_blocked(update)
         
         # Log user message for admin monitoring
-        self.db.log_user_message(user.id, user.username or "", query, 'text')
+        self._buffer_log(self._pending_messages, (user.id, user.username or "", query, 'text'))
         
         if len(query) < 2:
             await update.message.reply_text(
@@ -229,7 +358,7 @@ class BotHandlers:
             return
         
         # Check rate limiting
-        if not self.db.check_rate_limit(user.id, "search"):
+        if not await self.db.run(self.db.check_rate_limit, user.id, "search"):
             await update.message.reply_text(
                 "⚠️ You are searching too fast. Please wait a moment and try again."
             )
@@ -237,13 +366,13 @@ class BotHandlers:
         
         try:
             # Search in database
-            search_results = self.db.search_movies(query, Config.MAX_SEARCH_RESULTS)
+            search_results = await self.db.run(self.db.search_movies, query, Config.MAX_SEARCH_RESULTS)
             
             # Apply fuzzy matching for better results
             fuzzy_results = fuzzy_search_movies(query, search_results, Config.FUZZY_SEARCH_THRESHOLD)
             
             # Log the search
-            self.db.log_search(user.id, user.username or "", query, len(fuzzy_results))
+            self._buffer_log(self._pending_searches, (user.id, user.username or "", query, len(fuzzy_results)))
             
             if not fuzzy_results:
                 # Add movie request button
@@ -265,26 +394,13 @@ class BotHandlers:
                 return
             
             # Create inline keyboard with results
-            keyboard = []
-            for movie in fuzzy_results[:Config.MAX_SEARCH_RESULTS]:
-                title_info = f"{movie['title']}"
-                if movie['year']:
-                    title_info += f" ({movie['year']})"
-                if movie['quality']:
-                    title_info += f" - {movie['quality']}"
-                if movie['part_season_episode']:
-                    title_info += f" - {movie['part_season_episode']}"
-                
-                # Truncate if too long
-                if len(title_info) > 60:
-                    title_info = title_info[:57] + "..."
-                
-                keyboard.append([
-                    InlineKeyboardButton(
-                        f"🎬 {title_info}",
-                        callback_data=f"download_{movie['id']}"
-                    )
-                ])
+            keyboard = [
+                [InlineKeyboardButton(
+                    f"🎬 {self._result_label(movie)}",
+                    callback_data=f"download_{movie['id']}"
+                )]
+                for movie in fuzzy_results[:Config.MAX_SEARCH_RESULTS]
+            ]
             
             reply_markup = InlineKeyboardMarkup(keyboard)
             
@@ -351,6 +467,17 @@ class BotHandlers:
             "बस movie search करें और download button दबाएं।"
         )
 
+    @staticmethod
+    def _result_label(movie: dict) -> str:
+        """Button label for a search result, truncated to fit"""
+        title = f"{movie['title']} ({movie['year']})" if movie['year'] else movie['title']
+        title_info = " - ".join(filter(None, (title, movie['quality'], movie['part_season_episode'])))
+        
+        # Truncate if too long
+        if len(title_info) > 60:
+            title_info = title_info[:57] + "..."
+        return title_info
+    
     async def handle_file_upload(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle file uploads from admins"""
         user = update.effective_user
@@ -369,7 +496,7 @@ class BotHandlers:
                 return
         
         # Regular single file upload
-        if not self.db.check_rate_limit(user.id, "upload"):
+        if not await self.db.run(self.db.check_rate_limit, user.id, "upload"):
             # If rate limited, add to bulk queue instead
             success = await self.bulk_handler.add_to_upload_queue(update, context)
             if success:
@@ -391,7 +518,7 @@ class BotHandlers:
             
             # Check file extension
             file_name = file_obj.file_name or "unknown"
-            if not any(file_name.lower().endswith(ext) for ext in Config.ALLOWED_FILE_EXTENSIONS):
+            if os.path.splitext(file_name)[1].lower() not in Config.ALLOWED_EXTENSION_SET:
                 await update.message.reply_text(
                     f"❌ File type not supported. Allowed types: {', '.join(Config.ALLOWED_FILE_EXTENSIONS)}"
                 )
@@ -418,24 +545,13 @@ class BotHandlers:
             # Send processing message
             processing_msg = await update.message.reply_text("⏳ Processing upload...")
             
-            # Create download URL and shorten it
+            # Save with the bot's own link; the short URL is filled in afterwards
             original_url = f"https://t.me/{context.bot.username}?start=download_{file_obj.file_id}"
-            
-            # Import and use URL shortener
-            from url_shortener import URLShortener
-            url_shortener = URLShortener()
-            
-            try:
-                shortened_url = await url_shortener.shorten_url(original_url)
-                if not shortened_url or shortened_url == original_url:
-                    # Fallback if shortening fails
-                    shortened_url = f"https://t.me/{context.bot.username}?start=get_{file_obj.file_id}"
-            except Exception as e:
-                logger.error(f"URL shortening failed: {e}")
-                shortened_url = f"https://t.me/{context.bot.username}?start=get_{file_obj.file_id}"
+            fallback_url = f"https://t.me/{context.bot.username}?start=get_{file_obj.file_id}"
             
             # Save to database
-            movie_id = self.db.add_movie(
+            movie_id = await self.db.run(
+                self.db.add_movie,
                 title=parsed_info['title'],
                 year=parsed_info['year'],
                 quality=parsed_info['quality'],
@@ -444,89 +560,80 @@ class BotHandlers:
                 file_name=file_name,
                 file_size=file_obj.file_size or 0,  # Use 0 if file_size is None
                 original_url=original_url,
-                shortened_url=shortened_url,
+                shortened_url=fallback_url,
                 uploaded_by=user.id
             )
             
-            success_message = f"""
+            await processing_msg.edit_text(
+                self._upload_success_message(parsed_info, file_obj.file_size or 0, movie_id, fallback_url),
+                parse_mode='Markdown'
+            )
+            
+            task = asyncio.create_task(self._shorten_and_update(
+                movie_id, original_url, processing_msg, parsed_info, file_obj.file_size or 0
+            ))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+            
+            logger.info(f"Admin {user.id} uploaded movie: {parsed_info['title']} (ID: {movie_id})")
+            
+        except Exception as e:
+            logger.error(f"Error in handle_file_upload: {e}")
+            await update.message.reply_text(
+                "❌ An error occurred during upload. Please try again later."
+            )
+    
+    @staticmethod
+    def _upload_success_message(parsed_info: dict, file_size: int, movie_id: int, download_url: str) -> str:
+        """Upload confirmation shown to the admin"""
+        return f"""
 ✅ **Upload Successful!**
 
 🎬 **Title:** {parsed_info['title']}
 📅 **Year:** {parsed_info['year'] or 'N/A'}
 🎭 **Quality:** {parsed_info['quality']}
 📀 **Part/Season/Episode:** {parsed_info['part_season_episode']}
-📁 **File Size:** {format_file_size(file_obj.file_size or 0)}
+📁 **File Size:** {format_file_size(file_size)}
 🆔 **Movie ID:** {movie_id}
-🔗 **Download Link:** {shortened_url}
+🔗 **Download Link:** {download_url}
 
 The movie is now available for search!
 """
+    
+    async def _shorten_and_update(self, movie_id: int, original_url: str, processing_msg,
+                                  parsed_info: dict, file_size: int):
+        """Shorten a new movie's link in the background, then store it and refresh the confirmation"""
+        try:
+            shortened_url = await self.url_shortener.shorten_url(original_url)
+            if not shortened_url or shortened_url == original_url:
+                return  # keep the fallback link saved with the movie
             
-            await processing_msg.edit_text(success_message, parse_mode='Markdown')
-            
-            logger.info(f"Admin {user.id} uploaded movie: {parsed_info['title']} (ID: {movie_id})")
-            
-        except Exception as e:
-            logger.error(f"Error in handle_file_upload: {e}")
-            await update.message.reply_text(
-                "❌ An error occurred during upload. Please try again later."
+            await self.db.run(self.db.update_shortened_url, movie_id, shortened_url)
+            await processing_msg.edit_text(
+                self._upload_success_message(parsed_info, file_size, movie_id, shortened_url),
+                parse_mode='Markdown'
             )
+        except Exception as e:
+            logger.error(f"URL shortening failed for movie {movie_id}: {e}")
     
     async def handle_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle button callbacks"""
         query = update.callback_query
         await query.answer()
+        self._clear_dm_blocked(update)
         
-        user = query.from_user
         data = query.data
         
         try:
-            if data.startswith("download_"):
-                movie_id = int(data.split("_")[1])
-                await self._handle_download_request(query, user, movie_id, context)
-
-            elif data.startswith("request_movie_"):
-                movie_name = data.replace("request_movie_", "")
-                await self._handle_movie_request(query, user, movie_name, context)
-            elif data == "admin_movie_ads":
-                from admin_panel import AdminPanel
-                admin_panel = AdminPanel(self.db)
-                await admin_panel.show_movie_advertisements(update, context)
-            elif data == "admin_user_messages":
-                from admin_panel import AdminPanel
-                admin_panel = AdminPanel(self.db)
-                await admin_panel.show_user_messages(update, context)
-            elif data == "admin_movie_requests":
-                from admin_panel import AdminPanel
-                admin_panel = AdminPanel(self.db)
-                await admin_panel.show_movie_requests(update, context)
-            elif data == "admin_reset_verifications":
-                from admin_panel import AdminPanel
-                admin_panel = AdminPanel(self.db)
-                await admin_panel.reset_all_verifications(update, context)
-            elif data == "admin_confirm_reset":
-                from admin_panel import AdminPanel
-                admin_panel = AdminPanel(self.db)
-                await admin_panel.confirm_reset_verifications(update, context)
-            elif data.startswith("admin_advertise_"):
-                movie_id = int(data.split("_")[2])
-                from admin_panel import AdminPanel
-                admin_panel = AdminPanel(self.db)
-                await admin_panel.advertise_movie(update, context, movie_id)
-            elif data == "admin_back":
-                from admin_panel import AdminPanel
-                admin_panel = AdminPanel(self.db)
-                await admin_panel.show_admin_panel(update, context)
-            elif data.startswith("structure_"):
-                await self.structure_viewer.handle_structure_callback(query, context)
-            elif data.startswith("adminchat_"):
-                await self.admin_chat.handle_admin_chat_callback(query, context)
-            elif data.startswith("verify_complete_"):
-                # Auto verification system में यह feature नहीं है
-                await query.edit_message_text("❌ इस feature की जरूरत नहीं है auto system में।")
-            elif data.startswith("verification_help_"):
-                # Verification system removed
-                await query.edit_message_text("❌ वेरिफिकेशन सिस्टम हटा दिया गया है।")
+            handler = self._cb_exact.get(data)
+            if handler is not None:
+                await handler(update, context)
+                return
+            
+            head, _, tail = data.partition("_")
+            route = self._cb_prefix.get(head)
+            if route is not None and tail.startswith(route[0]):
+                await route[1](update, tail[len(route[0]):], context)
             
         except Exception as e:
             logger.error(f"Error in handle_callback: {e}")
@@ -538,7 +645,7 @@ The movie is now available for search!
         """Handle download request for a specific movie"""
         try:
             # Get movie details
-            movie = self.db.get_movie_by_id(movie_id)
+            movie = await self.db.run(self.db.get_movie_by_id, movie_id)
             
             if not movie:
                 await query.edit_message_text("❌ फिल्म नहीं मिली या उपलब्ध नहीं है।")
@@ -553,41 +660,58 @@ The movie is now available for search!
                 "❌ कोई त्रुटि हुई है। कृपया दोबारा कोशिश करें।"
             )
     
+    def _clear_dm_blocked(self, update: Update):
+        """Forget a cached DM refusal once the user writes to the bot privately"""
+        chat = update.effective_chat
+        if chat is not None and chat.type == ChatType.PRIVATE and update.effective_user:
+            self._dm_blocked.pop(update.effective_user.id, None)
+    
+    async def _send_to_dm(self, user, movie, context) -> bool:
+        """Send a movie to the user's DM, returning False if it could not be delivered there
+        
+        Users who have never started the bot or have blocked it make every
+        attempt fail, so that answer is cached and the DM call skipped for
+        DM_BLOCKED_CACHE_SECONDS.
+        """
+        if user.id in self._dm_blocked:
+            return False
+        
+        try:
+            await context.bot.send_document(
+                chat_id=user.id,
+                document=movie['file_id'],
+                caption=f"✅ **{movie['title']}** - डायरेक्ट डाउनलोड\n\n"
+                       f"📁 साइज़: {format_file_size(movie['file_size'])}\n"
+                       f"⏰ {Config.AUTO_DELETE_MINUTES} मिनट में ऑटो-डिलीट हो जाएगी"
+            )
+            self._dm_blocked.pop(user.id, None)
+            return True
+        except Exception as dm_error:
+            logger.warning(f"DM not accessible for user {user.id}: {dm_error}")
+            if isinstance(dm_error, Forbidden) or (
+                isinstance(dm_error, BadRequest) and "chat not found" in str(dm_error).lower()
+            ):
+                self._dm_blocked.set(user.id, True)
+            return False
+    
     async def _send_file_directly_from_start(self, update, user, movie, context):
         """Send file directly from start command"""
         try:
-            # Increment download count
-            self.db.increment_download_count(movie['id'])
+            # Log download and count it (written in the next batch)
+            self._record_download(user, movie['id'])
             
-            # Log download
-            self.db.log_download(user.id, user.username or "", movie['id'], Config.AUTO_DELETE_MINUTES)
-            
-            # Try to send file to DM
-            try:
-                await context.bot.send_document(
-                    chat_id=user.id,
-                    document=movie['file_id'],
-                    caption=f"✅ **{movie['title']}** - डायरेक्ट डाउनलोड\n\n"
-                           f"📁 साइज़: {format_file_size(movie['file_size'])}\n"
-                           f"⏰ {Config.AUTO_DELETE_MINUTES} मिनट में ऑटो-डिलीट हो जाएगी"
-                )
-                
+            # Try to send file to DM, unless the user recently couldn't be reached there
+            if await self._send_to_dm(user, movie, context):
                 # Schedule auto-delete
-                context.job_queue.run_once(
-                    self._auto_delete_file,
-                    when=timedelta(minutes=Config.AUTO_DELETE_MINUTES),
-                    data={'user_id': user.id, 'movie_title': movie['title']},
-                    name=f"delete_{user.id}_{movie['id']}_{datetime.now().timestamp()}"
-                )
+                self._schedule_delete(context.bot, user.id, movie['id'], movie['title'])
                 
                 await update.message.reply_text(
                     f"✅ **{movie['title']}** आपके DM में भेज दी गई!\n\n"
                     f"⏰ फाइल {Config.AUTO_DELETE_MINUTES} मिनट में ऑटो-डिलीट हो जाएगी।"
                 )
                 
-            except Exception as dm_error:
+            else:
                 # If DM fails, send file directly in the chat
-                logger.warning(f"DM not accessible for user {user.id}: {dm_error}")
                 try:
                     await update.message.reply_document(
                         document=movie['file_id'],
@@ -614,29 +738,13 @@ The movie is now available for search!
     async def _send_file_directly(self, query, user, movie, context):
         """Send file directly to user"""
         try:
-            # Increment download count
-            self.db.increment_download_count(movie['id'])
+            # Log download and count it (written in the next batch)
+            self._record_download(user, movie['id'])
             
-            # Log download
-            self.db.log_download(user.id, user.username or "", movie['id'], Config.AUTO_DELETE_MINUTES)
-            
-            # Try to send file to DM
-            try:
-                await context.bot.send_document(
-                    chat_id=user.id,
-                    document=movie['file_id'],
-                    caption=f"✅ **{movie['title']}** - डायरेक्ट डाउनलोड\n\n"
-                           f"📁 साइज़: {format_file_size(movie['file_size'])}\n"
-                           f"⏰ {Config.AUTO_DELETE_MINUTES} मिनट में ऑटो-डिलीट हो जाएगी"
-                )
-                
+            # Try to send file to DM, unless the user recently couldn't be reached there
+            if await self._send_to_dm(user, movie, context):
                 # Schedule auto-delete
-                context.job_queue.run_once(
-                    self._auto_delete_file,
-                    when=timedelta(minutes=Config.AUTO_DELETE_MINUTES),
-                    data={'user_id': user.id, 'movie_title': movie['title']},
-                    name=f"delete_{user.id}_{movie['id']}_{datetime.now().timestamp()}"
-                )
+                self._schedule_delete(context.bot, user.id, movie['id'], movie['title'])
                 
                 # Get shortened URL for sharing
                 shortened_url = movie.get('shortened_url', 'N/A')
@@ -647,9 +755,8 @@ The movie is now available for search!
                     f"⏰ फाइल {Config.AUTO_DELETE_MINUTES} मिनट में ऑटो-डिलीट हो जाएगी।"
                 )
                 
-            except Exception as dm_error:
+            else:
                 # If DM fails, send file directly in the chat
-                logger.warning(f"DM not accessible for user {user.id}: {dm_error}")
                 try:
                     await query.message.reply_document(
                         document=movie['file_id'],
@@ -679,7 +786,7 @@ The movie is now available for search!
         """Handle movie request from user"""
         try:
             # Add movie request to database
-            self.db.add_movie_request(user.id, user.username or "", movie_name)
+            await self.db.run(self.db.add_movie_request, user.id, user.username or "", movie_name)
             
             await query.edit_message_text(
                 f"✅ **Movie Request Submitted!**\n\n"
@@ -711,14 +818,36 @@ The movie is now available for search!
                 "❌ An error occurred while submitting your request."
             )
     
-    async def _auto_delete_file(self, context: ContextTypes.DEFAULT_TYPE):
+    def _schedule_delete(self, bot, user_id: int, movie_id: int, movie_title: str):
+        """Queue the auto-delete notice for a file just sent to a user"""
+        deadline = time.monotonic() + Config.AUTO_DELETE_MINUTES * 60
+        heapq.heappush(self._delete_heap, (deadline, user_id, movie_id, movie_title))
+        
+        if self._delete_task is None or self._delete_task.done():
+            self._delete_task = asyncio.create_task(self._delete_loop(bot))
+        self._delete_wakeup.set()
+    
+    async def _delete_loop(self, bot):
+        """Send auto-delete notices as they fall due, sleeping until the earliest deadline"""
+        heap = self._delete_heap
+        while True:
+            self._delete_wakeup.clear()
+            delay = heap[0][0] - time.monotonic() if heap else None
+            if delay is None or delay > 0:
+                # Woken early when a new notice is queued, in case it is due sooner
+                try:
+                    await asyncio.wait_for(self._delete_wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            _, user_id, _, movie_title = heapq.heappop(heap)
+            await self._auto_delete_file(bot, user_id, movie_title)
+    
+    async def _auto_delete_file(self, bot, user_id: int, movie_title: str):
         """Auto-delete file after specified time"""
         try:
-            job_data = context.job.data
-            user_id = job_data['user_id']
-            movie_title = job_data['movie_title']
-            
-            await context.bot.send_message(
+            await bot.send_message(
                 chat_id=user_id,
                 text=f"🗑️ **Auto-Delete Notice**\n\n"
                      f"The file **{movie_title}** has been automatically deleted for copyright protection.\n\n"
@@ -1,6 +1,6 @@
 import logging
 import asyncio
-from typing import List, Dict
+from typing import List, Dict, Optional
 from telegram import Update
 from telegram.ext import ContextTypes
 from telegram.error import TelegramError
@@ -14,9 +14,10 @@ logger = logging.getLogger(__name__)
 class BulkUploadHandler:
     """Handle bulk file uploads efficiently without hitting rate limits"""
     
-    def __init__(self, database: Database):
+    def __init__(self, database: Database, url_shortener: Optional[URLShortener] = None):
         self.db = database
-        self.url_shortener = URLShortener()
+        # Share the caller's shortener (and its HTTP session) when given one
+        self.url_shortener = url_shortener or URLShortener()
         self.upload_queue = []
         self.is_processing = False
         
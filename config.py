@@ -14,6 +14,13 @@ class Config:
         for admin_id in os.getenv("ADMIN_IDS", "8148695660").split(",") 
         if admin_id.strip().isdigit()
     ]
+    ADMIN_ID_SET = frozenset(ADMIN_IDS)  # O(1) membership checks
+    
+    # Worker processes for the auto filter bot; 0 means one per CPU core
+    BOT_WORKERS = int(os.getenv("BOT_WORKERS", "1"))
+    # Whether each worker keeps its own in-memory title trie (one copy per process)
+    # or searches the database only
+    SHARD_TITLE_INDEX = os.getenv("SHARD_TITLE_INDEX", "1") == "1"
     
     # URL shortener configuration
     INSHORT_API_KEY = os.getenv("INSHORT_API_KEY", "2768027b01bf104bca0240ed41ebd4e191df15cc")
@@ -23,6 +30,7 @@ class Config:
     # File configuration
     MAX_FILE_SIZE = None  # No file size limit - accept any size
     ALLOWED_FILE_EXTENSIONS = ['.mp4', '.mkv', '.avi', '.mov', '.wmv', '.flv', '.webm', '.m4v', '.mp3', '.wav', '.pdf', '.txt', '.zip', '.rar']
+    ALLOWED_EXTENSION_SET = frozenset(ext.lower() for ext in ALLOWED_FILE_EXTENSIONS)  # O(1) suffix checks
     
     # Auto-delete configuration
     AUTO_DELETE_MINUTES = 10
@@ -1,23 +1,151 @@
 import sqlite3
 import json
 import logging
+import re
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
 from contextlib import contextmanager
 
 logger = logging.getLogger(__name__)
 
+# Keep stats_snapshot in step with the tables it summarizes
+_STATS_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS stats_movies_insert AFTER INSERT ON movies
+    WHEN NEW.is_active = 1
+    BEGIN
+        UPDATE stats_snapshot SET value = value + 1 WHERE key = 'total_movies';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS stats_movies_delete AFTER DELETE ON movies
+    WHEN OLD.is_active = 1
+    BEGIN
+        UPDATE stats_snapshot SET value = value - 1 WHERE key = 'total_movies';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS stats_movies_active AFTER UPDATE OF is_active ON movies
+    WHEN (OLD.is_active = 1) IS NOT (NEW.is_active = 1)
+    BEGIN
+        UPDATE stats_snapshot
+        SET value = value + (NEW.is_active = 1) - (OLD.is_active = 1)
+        WHERE key = 'total_movies';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS stats_downloads_insert AFTER INSERT ON download_logs
+    BEGIN
+        UPDATE stats_snapshot SET value = value + 1 WHERE key = 'total_downloads';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS stats_downloads_delete AFTER DELETE ON download_logs
+    BEGIN
+        UPDATE stats_snapshot SET value = value - 1 WHERE key = 'total_downloads';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS stats_searches_insert AFTER INSERT ON search_logs
+    BEGIN
+        UPDATE stats_snapshot SET value = value + 1 WHERE key = 'total_searches';
+        UPDATE stats_snapshot SET value = value + 1
+        WHERE key = 'unique_users' AND NOT EXISTS (
+            SELECT 1 FROM search_logs WHERE user_id = NEW.user_id AND id != NEW.id
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS stats_searches_delete AFTER DELETE ON search_logs
+    BEGIN
+        UPDATE stats_snapshot SET value = value - 1 WHERE key = 'total_searches';
+        UPDATE stats_snapshot SET value = value - 1
+        WHERE key = 'unique_users' AND NOT EXISTS (
+            SELECT 1 FROM search_logs WHERE user_id = OLD.user_id
+        );
+    END
+    """,
+)
+
+# Keep the movies_fts index in step with movies (external content table)
+_FTS_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_fts_insert AFTER INSERT ON movies
+    BEGIN
+        INSERT INTO movies_fts (rowid, title, quality, part_season_episode)
+        VALUES (NEW.id, NEW.title, NEW.quality, NEW.part_season_episode);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_fts_delete AFTER DELETE ON movies
+    BEGIN
+        INSERT INTO movies_fts (movies_fts, rowid, title, quality, part_season_episode)
+        VALUES ('delete', OLD.id, OLD.title, OLD.quality, OLD.part_season_episode);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_fts_update AFTER UPDATE OF title, quality, part_season_episode ON movies
+    BEGIN
+        INSERT INTO movies_fts (movies_fts, rowid, title, quality, part_season_episode)
+        VALUES ('delete', OLD.id, OLD.title, OLD.quality, OLD.part_season_episode);
+        INSERT INTO movies_fts (rowid, title, quality, part_season_episode)
+        VALUES (NEW.id, NEW.title, NEW.quality, NEW.part_season_episode);
+    END
+    """,
+)
+
+_FTS_TOKEN = re.compile(r'[^\s"]+')
+
 class Database:
     """Database manager for the movie bot"""
     
+    STATEMENT_CACHE_SIZE = 256
+    MMAP_SIZE = 256 * 1024 * 1024
+    POOL_SIZE = 8  # worker threads for run(), each holding its own connection
+    BUSY_TIMEOUT_SECONDS = 10
+    
     def __init__(self, db_path: str = "movie_bot.db"):
         self.db_path = db_path
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=self.POOL_SIZE, thread_name_prefix="db")
+        self._fts_enabled = False
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the long-lived connection for the calling thread"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.BUSY_TIMEOUT_SECONDS,
+            check_same_thread=False,
+            cached_statements=self.STATEMENT_CACHE_SIZE
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL only needs a sync at checkpoints; NORMAL keeps it crash-safe
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA mmap_size={self.MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
         
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """Context manager for database connections
+        
+        Each thread keeps one connection open, so the file handle and the
+        prepared statement cache survive between calls, and under WAL the
+        run() pool threads read concurrently with a writer. Work left
+        uncommitted when the thread's outermost block exits is rolled
+        back, as closing a private connection used to do.
+        """
+        local = self._local
+        conn = getattr(local, 'conn', None)
+        if conn is None:
+            conn = local.conn = self._connect()
+            local.depth = 0
+        local.depth += 1
         try:
             yield conn
         except Exception as e:
@@ -25,7 +153,14 @@ class Database:
             logger.error(f"Database error: {e}")
             raise
         finally:
-            conn.close()
+            local.depth -= 1
+            if local.depth == 0 and conn.in_transaction:
+                conn.rollback()
+    
+    async def run(self, method, *args, **kwargs):
+        """Run a blocking Database method on the pool so the event loop keeps serving updates"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(method, *args, **kwargs))
     
     def init_db(self):
         """Initialize database tables"""
@@ -174,10 +309,62 @@ class Database:
                 )
             """)
             
+            # Movie advertisement deliveries, so a retried broadcast skips users already sent to
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS broadcast_log (
+                    movie_id INTEGER NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    sent_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (movie_id, user_id)
+                )
+            """)
+            
             # Create indexes for better performance
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_movies_title ON movies(title)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_movies_file_id ON movies(file_id)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_search_logs_user_date ON search_logs(user_id, search_date)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_search_logs_covering ON search_logs(search_date, user_id, search_query)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_download_logs_auto_delete ON download_logs(auto_delete_date)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_download_logs_date ON download_logs(download_date)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_movies_upload_active ON movies(upload_date, is_active)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_movies_active_downloads ON movies(is_active, download_count)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_messages_user_date ON user_messages(user_id, message_date)")
+            
+            # Running totals for get_stats, kept current by triggers instead of COUNT(*) scans
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS stats_snapshot (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            
+            # Recount on startup so existing databases start (and stay) exact
+            cursor.execute("""
+                INSERT OR REPLACE INTO stats_snapshot (key, value) VALUES
+                    ('total_movies', (SELECT COUNT(*) FROM movies WHERE is_active = 1)),
+                    ('total_downloads', (SELECT COUNT(*) FROM download_logs)),
+                    ('total_searches', (SELECT COUNT(*) FROM search_logs)),
+                    ('unique_users', (SELECT COUNT(DISTINCT user_id) FROM search_logs))
+            """)
+            
+            for trigger in _STATS_TRIGGERS:
+                cursor.execute(trigger)
+            
+            # Full-text index for search_movies; skipped if SQLite lacks FTS5
+            try:
+                cursor.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts USING fts5(
+                        title, quality, part_season_episode,
+                        content='movies', content_rowid='id'
+                    )
+                """)
+                for trigger in _FTS_TRIGGERS:
+                    cursor.execute(trigger)
+                # Rebuild on startup, like stats_snapshot, so existing rows are indexed
+                cursor.execute("INSERT INTO movies_fts (movies_fts) VALUES ('rebuild')")
+                self._fts_enabled = True
+            except sqlite3.OperationalError as e:
+                logger.warning(f"FTS5 unavailable, movie search will use LIKE: {e}")
             
             conn.commit()
             logger.info("Database initialized successfully")
@@ -204,10 +391,38 @@ class Database:
             return movie_id
     
     def search_movies(self, query: str, limit: int = 10) -> List[Dict]:
-        """Search for movies using the query"""
+        """Search for movies using the query
+        
+        Uses the movies_fts index (prefix match on every word, BM25 ranked
+        with title weighted highest) first. When that yields fewer than limit
+        rows, or FTS5 is unavailable, the LIKE scan tops the results up, so
+        mid-word matches ("man" in "Batman") are still found.
+        """
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
+            rows = []
+            tokens = _FTS_TOKEN.findall(query)
+            if self._fts_enabled and tokens:
+                match = " ".join(f'"{token}"*' for token in tokens)
+                try:
+                    cursor.execute("""
+                        SELECT m.* FROM movies_fts f
+                        JOIN movies m ON m.id = f.rowid
+                        WHERE movies_fts MATCH ? AND m.is_active = 1
+                        ORDER BY bm25(movies_fts, 10.0, 1.0, 1.0),
+                            m.download_count DESC,
+                            m.upload_date DESC
+                        LIMIT ?
+                    """, (match, limit))
+                    rows = cursor.fetchall()
+                except sqlite3.OperationalError as e:
+                    # Queries made only of punctuation are not valid MATCH input
+                    logger.debug(f"FTS search failed for {query!r}: {e}")
+                    rows = []
+                if len(rows) >= limit:
+                    return [self._search_result(row) for row in rows]
+            
             # Search in title, quality, and part_season_episode fields
             search_pattern = f"%{query}%"
             cursor.execute("""
@@ -229,9 +444,37 @@ class Database:
             """, (search_pattern, search_pattern, search_pattern,
                   f"{query}%", search_pattern, limit))
             
-            results = []
-            for row in cursor.fetchall():
-                results.append({
+            # FTS hits keep their rank; LIKE matches fill the remaining slots
+            seen = {row['id'] for row in rows}
+            rows += [row for row in cursor.fetchall() if row['id'] not in seen]
+            return [self._search_result(row) for row in rows[:limit]]
+    
+    @staticmethod
+    def _search_result(row: sqlite3.Row) -> Dict:
+        """Movie fields returned by search_movies"""
+        return {
+            'id': row['id'],
+            'title': row['title'],
+            'year': row['year'],
+            'quality': row['quality'],
+            'part_season_episode': row['part_season_episode'],
+            'file_id': row['file_id'],
+            'file_name': row['file_name'],
+            'file_size': row['file_size'],
+            'shortened_url': row['shortened_url'],
+            'download_count': row['download_count'],
+            'upload_date': row['upload_date']
+        }
+    
+    def get_movie_by_id(self, movie_id: int) -> Optional[Dict]:
+        """Get a movie by its ID"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM movies WHERE id = ? AND is_active = 1", (movie_id,))
+            row = cursor.fetchone()
+            
+            if row:
+                return {
                     'id': row['id'],
                     'title': row['title'],
                     'year': row['year'],
@@ -241,17 +484,15 @@ class Database:
                     'file_name': row['file_name'],
                     'file_size': row['file_size'],
                     'shortened_url': row['shortened_url'],
-                    'download_count': row['download_count'],
-                    'upload_date': row['upload_date']
-                })
-            
-            return results
+                    'download_count': row['download_count']
+                }
+            return None
     
-    def get_movie_by_id(self, movie_id: int) -> Optional[Dict]:
-        """Get a movie by its ID"""
+    def get_movie_by_file_id(self, file_id: str) -> Optional[Dict]:
+        """Get an active movie by its Telegram file_id"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM movies WHERE id = ? AND is_active = 1", (movie_id,))
+            cursor.execute("SELECT * FROM movies WHERE file_id = ? AND is_active = 1 LIMIT 1", (file_id,))
             row = cursor.fetchone()
             
             if row:
@@ -269,6 +510,15 @@ class Database:
                 }
             return None
     
+    def update_shortened_url(self, movie_id: int, shortened_url: str):
+        """Replace a movie's download link once its short URL is ready"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE movies SET shortened_url = ? WHERE id = ?
+            """, (shortened_url, movie_id))
+            conn.commit()
+    
     def increment_download_count(self, movie_id: int):
         """Increment the download count for a movie"""
         with self.get_connection() as conn:
@@ -302,6 +552,41 @@ class Database:
             """, (user_id, username, movie_id, auto_delete_date))
             conn.commit()
     
+    def write_log_batch(self, user_messages: List[tuple], searches: List[tuple],
+                        downloads: List[tuple], download_counts: Dict[int, int]):
+        """Write buffered log rows and download counts in one transaction
+        
+        Rows use the column order of log_user_message, log_search and
+        log_download (downloads carry their auto_delete_date already
+        computed). download_counts maps movie_id to the number of downloads
+        to add.
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            if user_messages:
+                cursor.executemany("""
+                    INSERT INTO user_messages (user_id, username, message_text, message_type)
+                    VALUES (?, ?, ?, ?)
+                """, user_messages)
+            if searches:
+                cursor.executemany("""
+                    INSERT INTO search_logs (user_id, username, search_query, results_count)
+                    VALUES (?, ?, ?, ?)
+                """, searches)
+            if downloads:
+                cursor.executemany("""
+                    INSERT INTO download_logs (user_id, username, movie_id, auto_delete_date)
+                    VALUES (?, ?, ?, ?)
+                """, downloads)
+            if download_counts:
+                # Sorted ids keep the row update order stable across writers
+                cursor.executemany("""
+                    UPDATE movies 
+                    SET download_count = download_count + ?, last_accessed = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                """, [(count, movie_id) for movie_id, count in sorted(download_counts.items())])
+            conn.commit()
+    
     def get_files_to_delete(self) -> List[Dict]:
         """Get files that should be auto-deleted"""
         with self.get_connection() as conn:
@@ -496,26 +781,14 @@ class Database:
             conn.commit()
             return True
     
-    def get_stats(self) -> Dict:
-        """Get bot statistics"""
+    def get_stats(self, top_n: int = 5) -> Dict:
+        """Get bot statistics, with the top_n most downloaded movies"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            # Total movies
-            cursor.execute("SELECT COUNT(*) as count FROM movies WHERE is_active = 1")
-            total_movies = cursor.fetchone()['count']
-            
-            # Total downloads
-            cursor.execute("SELECT COUNT(*) as count FROM download_logs")
-            total_downloads = cursor.fetchone()['count']
-            
-            # Total searches
-            cursor.execute("SELECT COUNT(*) as count FROM search_logs")
-            total_searches = cursor.fetchone()['count']
-            
-            # Unique users
-            cursor.execute("SELECT COUNT(DISTINCT user_id) as count FROM search_logs")
-            unique_users = cursor.fetchone()['count']
+            # Totals are maintained by the stats_snapshot triggers
+            cursor.execute("SELECT key, value FROM stats_snapshot")
+            totals = {row['key']: row['value'] for row in cursor.fetchall()}
             
             # Popular movies
             cursor.execute("""
@@ -523,18 +796,32 @@ class Database:
                 FROM movies 
                 WHERE is_active = 1 
                 ORDER BY download_count DESC 
-                LIMIT 5
-            """)
+                LIMIT ?
+            """, (top_n,))
             popular_movies = cursor.fetchall()
             
             return {
-                'total_movies': total_movies,
-                'total_downloads': total_downloads,
-                'total_searches': total_searches,
-                'unique_users': unique_users,
+                'total_movies': totals.get('total_movies', 0),
+                'total_downloads': totals.get('total_downloads', 0),
+                'total_searches': totals.get('total_searches', 0),
+                'unique_users': totals.get('unique_users', 0),
                 'popular_movies': [dict(movie) for movie in popular_movies]
             }
     
+    def get_blueprint_counts(self) -> Tuple[int, int, int]:
+        """Get (active movies, unique users, total downloads) in one query"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT
+                    COALESCE(MAX(CASE WHEN key = 'total_movies' THEN value END), 0) AS movies,
+                    COALESCE(MAX(CASE WHEN key = 'unique_users' THEN value END), 0) AS users,
+                    COALESCE(MAX(CASE WHEN key = 'total_downloads' THEN value END), 0) AS downloads
+                FROM stats_snapshot
+            """)
+            row = cursor.fetchone()
+            return row['movies'], row['users'], row['downloads']
+    
     def create_verification_request(self, user_id: int, movie_id: int, shortened_url: str) -> str:
         """Create a verification request and return a unique token"""
         import uuid
@@ -623,25 +910,54 @@ class Database:
             cursor.execute("DELETE FROM verification_steps")
             conn.commit()
     
-    def get_recent_user_messages(self, limit: int = 50) -> List[Dict]:
+    def get_recent_user_messages(self, limit: int = 50, offset: int = 0) -> List[Dict]:
         """Get recent user messages for admin monitoring"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT user_id, username, message_text, message_type, message_date,
+                       strftime('%m-%d %H:%M', message_date) as message_date_fmt,
+                       CASE WHEN length(message_text) > 50
+                            THEN substr(message_text, 1, 50) || '...'
+                            ELSE message_text END as preview
+                FROM user_messages 
+                ORDER BY message_date DESC 
+                LIMIT ? OFFSET ?
+            """, (limit, offset))
+            
+            return [dict(row) for row in cursor.fetchall()]
+    
+    def get_user_messages(self, user_id: int, limit: int = 5) -> List[Dict]:
+        """Get the most recent messages sent by a single user"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT user_id, username, message_text, message_type, message_date
                 FROM user_messages 
+                WHERE user_id = ?
                 ORDER BY message_date DESC 
                 LIMIT ?
-            """, (limit,))
+            """, (user_id, limit))
             
             return [dict(row) for row in cursor.fetchall()]
     
+    def count_user_messages(self, user_id: int) -> int:
+        """Count all messages sent by a single user"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT COUNT(*) as count FROM user_messages WHERE user_id = ?",
+                (user_id,)
+            )
+            return cursor.fetchone()['count']
+    
     def get_movie_requests(self, status: str = 'pending') -> List[Dict]:
         """Get movie requests by status"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT id, user_id, username, movie_name, request_date, status
+                SELECT id, user_id, username, movie_name, request_date, status,
+                       strftime('%m-%d %H:%M', request_date) as request_date_fmt
                 FROM movie_requests 
                 WHERE status = ?
                 ORDER BY request_date DESC
@@ -712,3 +1028,26 @@ class Database:
             cursor = conn.cursor()
             cursor.execute("SELECT DISTINCT user_id FROM search_logs")
             return [row['user_id'] for row in cursor.fetchall()]
+    
+    def get_pending_broadcast_users(self, movie_id: int) -> List[int]:
+        """Get broadcast user IDs that have not yet been sent this movie's advertisement"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT DISTINCT s.user_id FROM search_logs s
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM broadcast_log b
+                    WHERE b.movie_id = ? AND b.user_id = s.user_id
+                )
+            """, (movie_id,))
+            return [row['user_id'] for row in cursor.fetchall()]
+    
+    def log_broadcast_deliveries(self, movie_id: int, user_ids: List[int]):
+        """Record that a movie advertisement reached these users"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                "INSERT OR IGNORE INTO broadcast_log (movie_id, user_id) VALUES (?, ?)",
+                [(movie_id, user_id) for user_id in user_ids]
+            )
+            conn.commit()
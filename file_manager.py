@@ -9,6 +9,14 @@ logger = logging.getLogger(__name__)
 class FileManager:
     """File management utilities for the bot"""
     
+    # Shared across instances, keyed by directory: (st_mtime_ns, result).
+    # The directory mtime only changes when entries are added or removed, so
+    # growing files and changes inside subdirectories don't show up in it;
+    # download_file and delete_file invalidate explicitly, and changes made
+    # outside this class are only seen once the directory itself changes.
+    _size_cache: Dict[str, tuple] = {}
+    _listing_cache: Dict[str, tuple] = {}
+    
     def __init__(self):
         self.temp_dir = "temp_files"
         self.ensure_temp_directory()
@@ -29,9 +37,12 @@ class FileManager:
             async with aiohttp.ClientSession() as session:
                 async with session.get(file_url) as response:
                     if response.status == 200:
-                        with open(file_path, 'wb') as f:
-                            async for chunk in response.content.iter_chunked(8192):
-                                f.write(chunk)
+                        try:
+                            with open(file_path, 'wb') as f:
+                                async for chunk in response.content.iter_chunked(8192):
+                                    f.write(chunk)
+                        finally:
+                            self.invalidate_caches()
                         
                         logger.info(f"Downloaded file: {filename}")
                         return file_path
@@ -68,6 +79,7 @@ class FileManager:
         try:
             if os.path.exists(file_path):
                 os.remove(file_path)
+                self.invalidate_caches()
                 logger.info(f"Deleted file: {file_path}")
                 return True
             else:
@@ -101,6 +113,12 @@ class FileManager:
         
         return deleted_count
     
+    @classmethod
+    def invalidate_caches(cls):
+        """Drop cached directory sizes and listings after a change the mtime may miss"""
+        cls._size_cache.clear()
+        cls._listing_cache.clear()
+    
     def get_temp_file_path(self, filename: str) -> str:
         """Get full path for a temporary file"""
         return os.path.join(self.temp_dir, filename)
@@ -109,7 +127,7 @@ class FileManager:
         """Check if file is a valid video file"""
         from config import Config
         
-        return any(filename.lower().endswith(ext) for ext in Config.ALLOWED_FILE_EXTENSIONS)
+        return os.path.splitext(filename)[1].lower() in Config.ALLOWED_EXTENSION_SET
     
     def generate_unique_filename(self, base_name: str, extension: str) -> str:
         """Generate a unique filename"""
@@ -156,22 +174,40 @@ class FileManager:
         total_size = 0
         
         try:
-            for dirpath, dirnames, filenames in os.walk(directory):
-                for filename in filenames:
-                    file_path = os.path.join(dirpath, filename)
-                    if os.path.exists(file_path):
-                        total_size += os.path.getsize(file_path)
+            mtime_ns = os.stat(directory).st_mtime_ns
+            cached = self._size_cache.get(directory)
+            if cached is not None and cached[0] == mtime_ns:
+                return cached[1]
+            
+            total_size = self._scan_size(directory)
+            self._size_cache[directory] = (mtime_ns, total_size)
             
         except Exception as e:
             logger.error(f"Error calculating directory size: {e}")
         
         return total_size
     
+    def _scan_size(self, directory: str) -> int:
+        """Sum file sizes under directory without following symlinks"""
+        total_size = 0
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    total_size += self._scan_size(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    total_size += entry.stat(follow_symlinks=False).st_size
+        return total_size
+    
     def list_temp_files(self) -> List[Dict]:
         """List all files in temp directory with info"""
         files = []
         
         try:
+            mtime_ns = os.stat(self.temp_dir).st_mtime_ns
+            cached = self._listing_cache.get(self.temp_dir)
+            if cached is not None and cached[0] == mtime_ns:
+                return [dict(file_info) for file_info in cached[1]]
+            
             for filename in os.listdir(self.temp_dir):
                 file_path = os.path.join(self.temp_dir, filename)
                 
@@ -181,6 +217,8 @@ class FileManager:
                         file_info['path'] = file_path
                         files.append(file_info)
             
+            self._listing_cache[self.temp_dir] = (mtime_ns, [dict(file_info) for file_info in files])
+            
         except Exception as e:
             logger.error(f"Error listing temp files: {e}")
         
@@ -3,6 +3,7 @@ import logging
 import asyncio
 from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters
 from bot_handlers import BotHandlers
+from rate_limiter import RateLimiter
 from database import Database
 from config import Config
 
@@ -28,10 +29,16 @@ def main():
         bot_handlers = BotHandlers(db)
         
         # Create application
-        application = Application.builder().token(Config.BOT_TOKEN).build()
+        application = (
+            Application.builder()
+            .token(Config.BOT_TOKEN)
+            .rate_limiter(RateLimiter())
+            .post_shutdown(bot_handlers.shutdown)
+            .build()
+        )
         
         # Add handlers
-        application.add_handler(CommandHandler("start", bot_handlers.start_command))
+        application.add_handler(CommandHandler("start", bot_handlers.per_chat(bot_handlers.start_command)))
         application.add_handler(CommandHandler("admin", bot_handlers.admin_command))
         application.add_handler(CommandHandler("upload", bot_handlers.upload_command))
         application.add_handler(CommandHandler("bulkupload", bot_handlers.bulk_upload_command))
@@ -45,15 +52,21 @@ def main():
         # Message handlers
         application.add_handler(MessageHandler(
             filters.TEXT & ~filters.COMMAND, 
-            bot_handlers.handle_message
+            bot_handlers.per_chat(bot_handlers.handle_message)
         ))
         application.add_handler(MessageHandler(
             filters.Document.ALL | filters.VIDEO, 
-            bot_handlers.handle_file_upload
+            bot_handlers.per_chat(bot_handlers.handle_file_upload)
         ))
         
         # Callback query handler for buttons
-        application.add_handler(CallbackQueryHandler(bot_handlers.handle_callback))
+        application.add_handler(CallbackQueryHandler(bot_handlers.per_chat(bot_handlers.handle_callback)))
+        
+        # Periodic cleanup of idle admin chat sessions
+        bot_handlers.admin_chat.schedule_session_gc(application.job_queue)
+        
+        # Batched writes of search, message and download logs
+        bot_handlers.schedule_log_flush(application.job_queue)
         
         logger.info("Starting Telegram Movie Bot...")
         
@@ -3,6 +3,8 @@ Database models for Auto Filter Movie Bot
 """
 
 import os
+import asyncio
+import threading
 from datetime import datetime, timedelta
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
@@ -12,6 +14,28 @@ class Base(DeclarativeBase):
 
 db = SQLAlchemy(model_class=Base)
 
+# Per-thread record of the app whose context is already pushed on that thread
+_thread_state = threading.local()
+
+async def run_in_app_context(app, fn, *args, **kwargs):
+    """Run blocking database work in a worker thread under the app context
+    
+    Keeps the event loop free while the query runs. Each pool thread pushes
+    one long-lived app context the first time it is used instead of on every
+    call. The session is removed after each call, so fn should return plain
+    values, not ORM objects.
+    """
+    def _call():
+        if getattr(_thread_state, 'app', None) is not app:
+            app.app_context().push()
+            _thread_state.app = app
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            db.session.remove()
+    
+    return await asyncio.to_thread(_call)
+
 class User(db.Model):
     """User information table"""
     __tablename__ = 'users'
@@ -68,6 +92,42 @@ class Movie(db.Model):
     # Status
     is_active = db.Column(db.Boolean, default=True)
     is_featured = db.Column(db.Boolean, default=False)
+    
+    __table_args__ = (
+        # Active movies by popularity: filter + ORDER BY download_count DESC LIMIT n
+        db.Index('ix_movie_active_downloads', is_active, download_count.desc()),
+    )
+
+def ensure_query_indexes():
+    """Create the hot-query indexes on tables that predate them
+    
+    db.create_all() only adds indexes together with new tables.
+    """
+    for model in (Movie, DownloadLog, SearchLog):
+        for index in model.__table__.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+def ensure_movie_search_index():
+    """Add the PostgreSQL full-text search column and GIN index on movies
+    
+    The generated tsvector column lives outside the model so that
+    db.create_all() still works on SQLite. Returns True when full-text
+    search is available.
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return False
+    
+    with db.engine.begin() as conn:
+        conn.execute(db.text("""
+            ALTER TABLE movies ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (
+                to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(language, ''))
+            ) STORED
+        """))
+        conn.execute(db.text(
+            "CREATE INDEX IF NOT EXISTS movie_search_idx ON movies USING GIN (search_vector)"
+        ))
+    return True
 
 class UserVerification(db.Model):
     """Daily verification tracking"""
@@ -115,6 +175,10 @@ class DownloadLog(db.Model):
     # Auto-delete system
     auto_delete_time = db.Column(db.DateTime, nullable=True)
     is_deleted = db.Column(db.Boolean, default=False)
+    
+    __table_args__ = (
+        db.Index('ix_downloadlog_user', user_id, requested_at),
+    )
 
 class SearchLog(db.Model):
     """Search query tracking"""
@@ -122,9 +186,13 @@ class SearchLog(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.BigInteger, nullable=False)
-    query = db.Column(db.String(500), nullable=False)
+    query = db.Column(db.String(128), nullable=False)
     results_count = db.Column(db.Integer, default=0)
     search_date = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_searchlog_user', user_id, search_date),
+    )
 
 class URLShortener(db.Model):
     """URL shortening service tracking"""
@@ -0,0 +1,112 @@
+"""
+In-memory prefix index over movie titles for instant search
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+_WORD_START = re.compile(r'\b\w')
+
+class _TrieNode:
+    """A single trie node with its best-ranked movies"""
+    __slots__ = ('children', 'top')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.top: List[Tuple[int, int]] = []  # (download_count, movie_id), best first
+
+class MovieTrie:
+    """Prefix trie mapping title prefixes to the most downloaded movies
+
+    Every word of a title is indexed, so "endgame" finds "Avengers Endgame"
+    as well as "aven" does. Each node keeps its own top-K list, which makes a
+    lookup O(len(prefix)) regardless of catalog size.
+
+    Each word start is indexed at most MAX_PREFIX_DEPTH characters deep, so a
+    title costs O(words * MAX_PREFIX_DEPTH) nodes however long it is; longer
+    queries are matched on their first MAX_PREFIX_DEPTH characters.
+    """
+
+    MAX_PREFIX_DEPTH = 20
+
+    def __init__(self, top_k: int = 10):
+        self.top_k = top_k
+        self.root = _TrieNode()
+        self.size = 0
+
+    def insert(self, title: str, movie_id: int, download_count: int = 0):
+        """Index a movie title under every word prefix"""
+        text = title.lower()
+        entry = (download_count, movie_id)
+
+        for match in _WORD_START.finditer(text):
+            node = self.root
+            start = match.start()
+            for char in text[start:start + self.MAX_PREFIX_DEPTH]:
+                node = node.children.setdefault(char, _TrieNode())
+                self._offer(node, entry)
+
+        self.size += 1
+
+    def _offer(self, node: _TrieNode, entry: Tuple[int, int]):
+        """Keep entry in node's top-K list if it ranks high enough"""
+        top = node.top
+        if entry in top:
+            return
+        if len(top) >= self.top_k and entry <= top[-1]:
+            return
+        top.append(entry)
+        top.sort(reverse=True)
+        del top[self.top_k:]
+
+    def search_prefix(self, query: str, limit: int = 10) -> List[int]:
+        """Return up to limit movie IDs whose title has a word starting with query"""
+        node = self.root
+        for char in query.lower().strip()[:self.MAX_PREFIX_DEPTH]:
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        return [movie_id for _, movie_id in node.top[:limit]]
+
+    def search_fuzzy(self, query: str, max_distance: int = 2, limit: int = 10) -> List[int]:
+        """Return movie IDs with a title word prefix within max_distance edits of query
+
+        Walks the trie computing one Levenshtein row per node and prunes any
+        subtree whose row minimum already exceeds max_distance, so only the
+        branches that can still match are visited. Results are ordered by
+        edit distance, then downloads.
+        """
+        query = query.lower().strip()[:self.MAX_PREFIX_DEPTH]
+        if not query:
+            return []
+
+        width = len(query) + 1
+        rows = [list(range(width))]  # one reusable row per trie depth
+        best: Dict[int, Tuple[int, int]] = {}  # movie_id -> (distance, -download_count)
+
+        def walk(node: _TrieNode, char: str, depth: int):
+            if depth == len(rows):
+                rows.append([0] * width)
+            prev, row = rows[depth - 1], rows[depth]
+
+            row[0] = depth
+            for i in range(1, width):
+                cost = 0 if query[i - 1] == char else 1
+                row[i] = min(row[i - 1] + 1, prev[i] + 1, prev[i - 1] + cost)
+
+            distance = row[-1]
+            if distance <= max_distance:
+                for count, movie_id in node.top:
+                    key = (distance, -count)
+                    if key < best.get(movie_id, (max_distance + 1, 0)):
+                        best[movie_id] = key
+
+            if min(row) <= max_distance:
+                for next_char, child in node.children.items():
+                    walk(child, next_char, depth + 1)
+
+        for char, child in self.root.children.items():
+            walk(child, char, 1)
+
+        return sorted(best, key=best.get)[:limit]
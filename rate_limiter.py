@@ -0,0 +1,132 @@
+"""
+Outbound rate limiting for Telegram Bot API calls
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import timedelta
+from typing import Any, Dict, Optional, Union
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+logger = logging.getLogger(__name__)
+
+class _Window:
+    """Sliding-window admission for one scope: at most limit calls per period"""
+    __slots__ = ('limit', 'period', 'stamps', 'lock')
+
+    def __init__(self, limit: int, period: float):
+        self.limit = limit
+        self.period = period
+        self.stamps: deque = deque()
+        self.lock = asyncio.Lock()
+
+    def _expire(self, now: float):
+        stamps = self.stamps
+        while stamps and stamps[0] <= now - self.period:
+            stamps.popleft()
+
+    def idle(self, now: float) -> bool:
+        self._expire(now)
+        return not self.stamps and not self.lock.locked()
+
+    async def acquire(self):
+        """Wait until the window has room, then take a slot (waiters are served in order)"""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self._expire(now)
+                if len(self.stamps) < self.limit:
+                    self.stamps.append(now)
+                    return
+                await asyncio.sleep(self.stamps[0] + self.period - now)
+
+class RateLimiter(BaseRateLimiter):
+    """Keeps the bot under Telegram's flood limits before requests are sent
+
+    Every Bot API call passes through the global window; calls that post
+    messages also pass through a window for their chat (1/s for private
+    chats, 20/min for groups and channels). Edits only count globally, so a
+    send followed by an edit of the same message isn't held back a second. On a RetryAfter the whole bot
+    pauses for the requested time, doubling on repeated hits.
+    
+    Processes sharing one bot token pass share=N so each gets 1/N of the
+    global budget and together they stay under Telegram's limit.
+    """
+
+    GLOBAL_PER_SECOND = 30
+    PRIVATE_CHAT_PER_SECOND = 1
+    GROUP_PER_MINUTE = 20
+    MAX_RETRIES = 3
+    MAX_TRACKED_CHATS = 10000
+    _CHAT_SCOPED = ('send', 'copy', 'forward')
+
+    def __init__(self, share: int = 1):
+        limit = self.GLOBAL_PER_SECOND // share
+        if limit >= 1:
+            self._global = _Window(limit, 1.0)
+        else:
+            # More processes than calls per second: one call every share/30 s each
+            self._global = _Window(1, share / self.GLOBAL_PER_SECOND)
+        self._chats: Dict[Union[int, str], _Window] = {}
+        self._paused_until = 0.0
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        self._chats.clear()
+
+    def _chat_window(self, chat_id: Union[int, str]) -> _Window:
+        window = self._chats.get(chat_id)
+        if window is None:
+            if len(self._chats) >= self.MAX_TRACKED_CHATS:
+                now = time.monotonic()
+                for key in [k for k, w in self._chats.items() if w.idle(now)]:
+                    del self._chats[key]
+            # Negative IDs and @usernames are groups or channels
+            if isinstance(chat_id, str) or chat_id < 0:
+                window = _Window(self.GROUP_PER_MINUTE, 60.0)
+            else:
+                window = _Window(self.PRIVATE_CHAT_PER_SECOND, 1.0)
+            self._chats[chat_id] = window
+        return window
+
+    async def process_request(
+        self,
+        callback,
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[int],
+    ):
+        chat_id = data.get('chat_id')
+        chat_window = None
+        if chat_id is not None and endpoint.startswith(self._CHAT_SCOPED):
+            chat_window = self._chat_window(chat_id)
+
+        max_retries = self.MAX_RETRIES if rate_limit_args is None else rate_limit_args
+        for attempt in range(max_retries + 1):
+            if chat_window is not None:
+                await chat_window.acquire()
+            await self._global.acquire()
+
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                if attempt == max_retries:
+                    raise
+                retry_after = e.retry_after
+                if isinstance(retry_after, timedelta):
+                    retry_after = retry_after.total_seconds()
+                delay = retry_after * 2 ** attempt
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                logger.warning(f"Flood control hit on {endpoint}, pausing sends for {delay}s")
@@ -0,0 +1,58 @@
+import random
+import unittest
+
+from movie_trie import MovieTrie
+
+def _count_nodes(trie: MovieTrie) -> int:
+    count, stack = 0, [trie.root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node.children.values())
+    return count
+
+class MovieTrieTest(unittest.TestCase):
+
+    def _catalogue(self, size: int) -> list:
+        rng = random.Random(42)
+        words = [
+            ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(3, 12)))
+            for _ in range(5000)
+        ]
+        titles = []
+        for _ in range(size):
+            title = ' '.join(rng.choice(words) for _ in range(rng.randint(1, 6)))
+            # Release-style names: "title 2019 1080p web-dl x264 hindi dual audio"
+            if rng.random() < 0.3:
+                title += ' 2019 1080p web-dl x264 hindi english dual audio esubs'
+            titles.append(title)
+        return titles
+
+    def test_node_count_bounded_for_catalogue(self):
+        titles = self._catalogue(20000)
+        trie = MovieTrie()
+        for movie_id, title in enumerate(titles):
+            trie.insert(title, movie_id)
+
+        word_starts = sum(len(title.split()) + title.count('-') for title in titles)
+        self.assertLessEqual(_count_nodes(trie), word_starts * MovieTrie.MAX_PREFIX_DEPTH + 1)
+
+    def test_long_title_depth_capped(self):
+        trie = MovieTrie()
+        title = 'a' * 500
+        trie.insert(title, 1)
+
+        self.assertEqual(_count_nodes(trie), MovieTrie.MAX_PREFIX_DEPTH + 1)
+        self.assertEqual(trie.search_prefix(title), [1])
+
+    def test_search_beyond_depth_matches_on_capped_prefix(self):
+        trie = MovieTrie()
+        trie.insert('The Lord of the Rings The Fellowship of the Ring', 1)
+        trie.insert('Avengers Endgame', 2)
+
+        self.assertEqual(trie.search_prefix('lord of the rings the fellowship'), [1])
+        self.assertEqual(trie.search_prefix('endgame'), [2])
+        self.assertEqual(trie.search_fuzzy('lord of the rigns the fellowship', max_distance=2), [1])
+
+if __name__ == '__main__':
+    unittest.main()
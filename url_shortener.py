@@ -6,11 +6,35 @@ from config import Config
 logger = logging.getLogger(__name__)
 
 class URLShortener:
-    """URL shortener service using inshorturl.com"""
+    """URL shortener service using inshorturl.com
     
-    def __init__(self):
+    Requests share one aiohttp session, so TCP/TLS connections to the API
+    are reused across calls. Pass a session to share it with other code, or
+    let the shortener open its own on first use and call close() on shutdown.
+    """
+    
+    CONNECTION_LIMIT = 20
+    DNS_CACHE_SECONDS = 300
+    
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
         self.api_token = Config.INSHORT_API_TOKEN or Config.INSHORT_API_KEY
         self.api_url = "https://inshorturl.com/api"
+        self._session = session
+        self._owns_session = session is None
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, opening it inside the running event loop if needed"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.CONNECTION_LIMIT, ttl_dns_cache=self.DNS_CACHE_SECONDS)
+            )
+            self._owns_session = True
+        return self._session
+    
+    async def close(self):
+        """Close the session if this shortener opened it"""
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
         
     async def shorten_url(self, original_url: str) -> Optional[str]:
         """Shorten a URL using inshorturl.com service"""
@@ -30,24 +54,24 @@ class URLShortener:
                 'User-Agent': 'TelegramMovieBot/1.0'
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    api_request_url,
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
+            session = self._get_session()
+            async with session.get(
+                api_request_url,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=30)
+            ) as response:
                     
-                    if response.status == 200:
-                        shortened_url = await response.text()
-                        shortened_url = shortened_url.strip()
+                if response.status == 200:
+                    shortened_url = await response.text()
+                    shortened_url = shortened_url.strip()
                         
-                        if shortened_url and shortened_url.startswith('http'):
-                            logger.info(f"URL shortened successfully: {original_url} -> {shortened_url}")
-                            return shortened_url
-                        else:
-                            logger.error(f"API returned invalid response: {shortened_url}")
+                    if shortened_url and shortened_url.startswith('http'):
+                        logger.info(f"URL shortened successfully: {original_url} -> {shortened_url}")
+                        return shortened_url
                     else:
-                        logger.error(f"HTTP error {response.status}: {await response.text()}")
+                        logger.error(f"API returned invalid response: {shortened_url}")
+                else:
+                    logger.error(f"HTTP error {response.status}: {await response.text()}")
                         
         except Exception as e:
             logger.error(f"Error while shortening URL: {e}")
@@ -59,13 +83,13 @@ class URLShortener:
     async def expand_url(self, short_url: str) -> Optional[str]:
         """Expand a shortened URL (if needed for verification)"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.head(
-                    short_url,
-                    allow_redirects=True,
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as response:
-                    return str(response.url)
+            session = self._get_session()
+            async with session.head(
+                short_url,
+                allow_redirects=True,
+                timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                return str(response.url)
                     
         except Exception as e:
             logger.error(f"Error expanding URL {short_url}: {e}")
@@ -74,12 +98,12 @@ class URLShortener:
     async def verify_shortened_url(self, short_url: str) -> bool:
         """Verify that a shortened URL is accessible"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.head(
-                    short_url,
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as response:
-                    return response.status < 400
+            session = self._get_session()
+            async with session.head(
+                short_url,
+                timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                return response.status < 400
                     
         except Exception as e:
             logger.error(f"Error verifying URL {short_url}: {e}")
@@ -96,21 +120,21 @@ class URLShortener:
                 'action': 'stats'
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.api_url.replace('/shorten', '/stats'),
-                    json=stats_payload,
-                    timeout=aiohttp.ClientTimeout(total=15)
-                ) as response:
+            session = self._get_session()
+            async with session.post(
+                self.api_url.replace('/shorten', '/stats'),
+                json=stats_payload,
+                timeout=aiohttp.ClientTimeout(total=15)
+            ) as response:
                     
-                    if response.status == 200:
-                        data = await response.json()
-                        if data.get('success'):
-                            return {
-                                'clicks': data.get('clicks', 0),
-                                'created_date': data.get('created_date'),
-                                'last_click': data.get('last_click')
-                            }
+                if response.status == 200:
+                    data = await response.json()
+                    if data.get('success'):
+                        return {
+                            'clicks': data.get('clicks', 0),
+                            'created_date': data.get('created_date'),
+                            'last_click': data.get('last_click')
+                        }
                             
         except Exception as e:
             logger.error(f"Error getting URL stats: {e}")
@@ -1,10 +1,118 @@
 import re
+import time
+import asyncio
 import logging
+from functools import lru_cache, wraps
 from typing import Dict, List, Optional
 from fuzzywuzzy import fuzz, process
+from fuzzywuzzy import utils as fuzz_utils
 
 logger = logging.getLogger(__name__)
 
+_MISSING = object()
+
+class ChatSerializer:
+    """Runs handlers in order per chat but concurrently across chats
+    
+    Each chat gets an asyncio.Queue drained by its own worker task, so a slow
+    search or file send in one chat no longer holds up updates from others.
+    A worker exits after idle_seconds without updates.
+    """
+    
+    def __init__(self, idle_seconds: float = 300):
+        self.idle_seconds = idle_seconds
+        self._queues = {}  # {chat_id: asyncio.Queue of pending handler coroutines}
+        self._workers = set()
+    
+    def wrap(self, handler):
+        """Wrap an (update, context) handler so it runs on its chat's worker"""
+        async def dispatch(update, context):
+            chat = update.effective_chat
+            if chat is None:
+                await handler(update, context)
+                return
+            
+            chat_queue = self._queues.get(chat.id)
+            if chat_queue is None:
+                chat_queue = self._queues[chat.id] = asyncio.Queue()
+                worker = asyncio.create_task(self._worker(chat.id, chat_queue))
+                self._workers.add(worker)
+                worker.add_done_callback(self._workers.discard)
+            chat_queue.put_nowait(handler(update, context))
+        
+        return dispatch
+    
+    async def _worker(self, chat_id: int, chat_queue: asyncio.Queue):
+        """Run one chat's queued handlers in arrival order, exiting once idle"""
+        while True:
+            try:
+                coro = await asyncio.wait_for(chat_queue.get(), timeout=self.idle_seconds)
+            except asyncio.TimeoutError:
+                if chat_queue.empty():
+                    del self._queues[chat_id]
+                    return
+                continue
+            
+            try:
+                await coro
+            except Exception as e:
+                logger.error(f"Error handling update for chat {chat_id}: {e}")
+    
+    def close(self):
+        """Cancel every chat worker and discard the handlers still queued"""
+        for worker in list(self._workers):
+            worker.cancel()
+        for chat_queue in self._queues.values():
+            while not chat_queue.empty():
+                chat_queue.get_nowait().close()  # never awaited, so close to avoid the warning
+        self._queues.clear()
+
+class TTLMap:
+    """Bounded cache whose entries expire ttl seconds after they are set
+    
+    Entries are kept in insertion order, so once maxsize is reached the
+    oldest one is evicted in O(1) instead of rescanning the whole map.
+    Expired entries are dropped when read.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = {}  # {key: (value, expires_at monotonic)}
+    
+    def get(self, key, default=None):
+        """Return the live value for key, or default"""
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        if time.monotonic() < entry[1]:
+            return entry[0]
+        del self._data[key]
+        return default
+    
+    def set(self, key, value, ttl: Optional[float] = None):
+        """Store value for ttl seconds (the map's default when None)"""
+        data = self._data
+        data.pop(key, None)  # re-insert at the end so order follows age
+        if len(data) >= self.maxsize:
+            data.pop(next(iter(data)))
+        data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+    
+    def pop(self, key, default=None):
+        """Remove key, returning its value (expired or not) or default"""
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+    
+    def clear(self):
+        self._data.clear()
+    
+    def __contains__(self, key) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+    
+    def __len__(self) -> int:
+        return len(self._data)
+
+@lru_cache(maxsize=4096)
 def format_file_size(size_bytes: int) -> str:
     """Convert bytes to human readable file size"""
     if size_bytes == 0:
@@ -58,36 +166,40 @@ def parse_upload_caption(caption: str) -> Optional[Dict]:
         logger.error(f"Error parsing upload caption: {e}")
         return None
 
+@lru_cache(maxsize=16384)
+def _movie_search_text(title: str, quality: str, part_season_episode, year) -> str:
+    """Normalized search string for a movie, memoized across searches"""
+    search_string = f"{title} {quality} {part_season_episode}"
+    if year:
+        search_string += f" {year}"
+    return fuzz_utils.full_process(search_string)
+
 def fuzzy_search_movies(query: str, movies: List[Dict], threshold: int = 60) -> List[Dict]:
     """Perform fuzzy search on movies list"""
     if not movies:
         return []
     
     try:
-        # Create searchable strings for each movie
-        movie_strings = []
-        for movie in movies:
-            search_string = f"{movie['title']} {movie['quality']} {movie['part_season_episode']}"
-            if movie['year']:
-                search_string += f" {movie['year']}"
-            movie_strings.append(search_string)
-        
-        # Perform fuzzy matching
-        matches = process.extract(query, movie_strings, scorer=fuzz.partial_ratio, limit=len(movies))
-        
-        # Filter by threshold and sort by score
+        # Titles are normalized once and reused, so only the query is processed per call
+        processed_query = fuzz_utils.full_process(query)
+        if not processed_query:
+            return []
+        movie_strings = {
+            index: _movie_search_text(movie['title'], movie['quality'], movie['part_season_episode'], movie['year'])
+            for index, movie in enumerate(movies)
+        }
+        
+        # Perform fuzzy matching; the C Levenshtein scorer drops matches below threshold
+        matches = process.extractBests(
+            processed_query, movie_strings, processor=None, scorer=fuzz.partial_ratio,
+            score_cutoff=threshold, limit=None
+        )
+        
         filtered_results = []
-        for match_result in matches:
-            if len(match_result) == 3:
-                match, score, index = match_result
-            else:
-                match, score = match_result
-                index = movie_strings.index(match)
-                
-            if score >= threshold:
-                movie = movies[index].copy()
-                movie['search_score'] = score
-                filtered_results.append(movie)
+        for _, score, index in matches:
+            movie = movies[index].copy()
+            movie['search_score'] = score
+            filtered_results.append(movie)
         
         # Sort by search score (highest first) and then by download count
         filtered_results.sort(key=lambda x: (x['search_score'], x['download_count']), reverse=True)
@@ -205,6 +317,7 @@ def sanitize_text(text: str) -> str:
     
     return text.strip()
 
+@lru_cache(maxsize=4096)
 def format_duration(seconds: int) -> str:
     """Format duration in seconds to human readable format"""
     if seconds < 60:
@@ -221,7 +334,22 @@ def format_duration(seconds: int) -> str:
 def is_admin(user_id: int) -> bool:
     """Check if user is an admin"""
     from config import Config
-    return user_id in Config.ADMIN_IDS
+    return user_id in Config.ADMIN_ID_SET
+
+def admin_only(denied_message: str = "❌ Admin access required."):
+    """Restrict an async (self, update, context) command handler to admins
+    
+    Non-admins get denied_message and the handler body never runs.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        async def wrapper(self, update, context, *args, **kwargs):
+            if not is_admin(update.effective_user.id):
+                await update.message.reply_text(denied_message)
+                return
+            return await handler(self, update, context, *args, **kwargs)
+        return wrapper
+    return decorator
 
 def truncate_text(text: str, max_length: int = 100) -> str:
     """Truncate text to specified length"""
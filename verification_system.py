@@ -6,8 +6,9 @@ import uuid
 import hashlib
 import aiohttp
 from datetime import datetime, timedelta
-from models import db, User, UserVerification, DownloadLog, URLShortener
+from models import db, User, UserVerification, DownloadLog, URLShortener, run_in_app_context
 from config import Config
+from utils import TTLMap
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,19 +16,45 @@ logger = logging.getLogger(__name__)
 class VerificationSystem:
     """Handles daily user verification through shortened URLs"""
     
-    def __init__(self):
+    STATUS_CACHE_SECONDS = 60
+    STATUS_CACHE_MAX_USERS = 50000
+    
+    def __init__(self, app):
+        self.app = app
         self.api_key = Config.INSHORT_API_KEY
         self.api_url = Config.INSHORT_API_URL
+        self._status_cache = TTLMap(self.STATUS_CACHE_MAX_USERS, self.STATUS_CACHE_SECONDS)
     
     async def check_user_verification_status(self, user_id: int) -> dict:
         """
-        Check if user needs verification today
+        Check if user needs verification today, cached for up to a minute
         Returns: {
             'needs_verification': bool,
             'last_verified': datetime or None,
             'hours_remaining': int
         }
         """
+        cached = self._status_cache.get(user_id)
+        if cached is not None:
+            return cached
+        
+        status, valid_seconds = await run_in_app_context(
+            self.app, self._load_user_verification_status, user_id
+        )
+        
+        self._status_cache.set(user_id, status, ttl=min(self.STATUS_CACHE_SECONDS, valid_seconds))
+        return status
+    
+    def invalidate_user_status(self, user_id: int):
+        """Drop a user's cached verification status after it changes"""
+        self._status_cache.pop(user_id, None)
+    
+    def _load_user_verification_status(self, user_id: int) -> tuple:
+        """Read verification status from the database
+        
+        Returns (status, seconds the status stays accurate for), so a
+        verified user is never cached past the end of their 24 hours.
+        """
         user = User.query.filter_by(user_id=user_id).first()
         
         if not user:
@@ -36,24 +63,25 @@ class VerificationSystem:
                 'needs_verification': True,
                 'last_verified': None,
                 'hours_remaining': 24
-            }
+            }, self.STATUS_CACHE_SECONDS
         
         if user.is_verified_today():
             # User is verified for today
             time_diff = datetime.utcnow() - user.last_verified
             hours_remaining = 24 - int(time_diff.total_seconds() / 3600)
+            valid_seconds = timedelta(hours=24).total_seconds() - time_diff.total_seconds()
             return {
                 'needs_verification': False,
                 'last_verified': user.last_verified,
                 'hours_remaining': max(0, hours_remaining)
-            }
+            }, valid_seconds
         else:
             # User needs verification
             return {
                 'needs_verification': True,
                 'last_verified': user.last_verified,
                 'hours_remaining': 24
-            }
+            }, self.STATUS_CACHE_SECONDS
     
     async def create_verification_request(self, user_id: int, movie_id: int) -> dict:
         """
@@ -71,12 +99,33 @@ class VerificationSystem:
         original_url = f"https://t.me/{Config.BOT_USERNAME}?start=verify_{verification_token}"
         
         # Create short URL
-        short_url = await self._create_short_url(original_url, verification_token)
+        short_url, url_mapping = await self._create_short_url(original_url, verification_token)
         
         # Set expiration (24 hours from now)
         expires_at = datetime.utcnow() + timedelta(hours=24)
         
         # Save verification request to database
+        verification_id = await run_in_app_context(
+            self.app, self._save_verification_request,
+            user_id, movie_id, verification_token, short_url, original_url, expires_at, url_mapping
+        )
+        
+        logger.info(f"Created verification request for user {user_id}, movie {movie_id}")
+        
+        return {
+            'verification_token': verification_token,
+            'short_url': short_url,
+            'expires_at': expires_at,
+            'verification_id': verification_id
+        }
+    
+    def _save_verification_request(self, user_id: int, movie_id: int, verification_token: str,
+                                   short_url: str, original_url: str, expires_at: datetime,
+                                   url_mapping: dict = None) -> int:
+        """Insert the verification row (and its short URL mapping) and return its ID"""
+        if url_mapping:
+            db.session.add(URLShortener(**url_mapping))
+        
         verification = UserVerification(
             user_id=user_id,
             movie_id=movie_id,
@@ -88,15 +137,7 @@ class VerificationSystem:
         
         db.session.add(verification)
         db.session.commit()
-        
-        logger.info(f"Created verification request for user {user_id}, movie {movie_id}")
-        
-        return {
-            'verification_token': verification_token,
-            'short_url': short_url,
-            'expires_at': expires_at,
-            'verification_id': verification.id
-        }
+        return verification.id
     
     async def verify_user_by_token(self, verification_token: str) -> dict:
         """
@@ -108,6 +149,13 @@ class VerificationSystem:
             'message': str
         }
         """
+        result = await run_in_app_context(self.app, self._verify_token, verification_token)
+        if result['success']:
+            self.invalidate_user_status(result['user_id'])
+        return result
+    
+    def _verify_token(self, verification_token: str) -> dict:
+        """Mark the verification and its user as verified in the database"""
         verification = UserVerification.query.filter_by(
             verification_token=verification_token,
             is_verified=False
@@ -154,8 +202,11 @@ class VerificationSystem:
             'message': '✅ Verification successful! आपकी फाइल भेजी जा रही है...'
         }
     
-    async def _create_short_url(self, original_url: str, verification_token: str) -> str:
-        """Create shortened URL using InShort API"""
+    async def _create_short_url(self, original_url: str, verification_token: str) -> tuple:
+        """Create shortened URL using InShort API
+        
+        Returns (short_url, URLShortener fields to save, or None).
+        """
         try:
             async with aiohttp.ClientSession() as session:
                 data = {
@@ -169,23 +220,22 @@ class VerificationSystem:
                         if result.get('status') == 'success':
                             short_url = result.get('shortenedUrl')
                             
-                            # Save URL mapping
-                            url_shortener = URLShortener(
-                                original_url=original_url,
-                                short_url=short_url,
-                                short_code=verification_token[:10],
-                                expires_at=datetime.utcnow() + timedelta(hours=24)
-                            )
-                            db.session.add(url_shortener)
+                            # URL mapping, saved with the verification request
+                            url_mapping = {
+                                'original_url': original_url,
+                                'short_url': short_url,
+                                'short_code': verification_token[:10],
+                                'expires_at': datetime.utcnow() + timedelta(hours=24)
+                            }
                             
-                            return short_url
+                            return short_url, url_mapping
             
             # Fallback if API fails
-            return f"https://short.link/{verification_token[:8]}"
+            return f"https://short.link/{verification_token[:8]}", None
             
         except Exception as e:
             logger.error(f"URL shortening failed: {e}")
-            return f"https://t.me/{Config.BOT_USERNAME}?start=verify_{verification_token}"
+            return f"https://t.me/{Config.BOT_USERNAME}?start=verify_{verification_token}", None
     
     def _generate_verification_token(self, user_id: int, movie_id: int) -> str:
         """Generate unique verification token"""
@@ -198,6 +248,10 @@ class VerificationSystem:
     
     async def get_verification_stats(self) -> dict:
         """Get verification statistics"""
+        return await run_in_app_context(self.app, self._load_verification_stats)
+    
+    def _load_verification_stats(self) -> dict:
+        """Count verifications by state in the database"""
         total_verifications = UserVerification.query.count()
         successful_verifications = UserVerification.query.filter_by(is_verified=True).count()
         pending_verifications = UserVerification.query.filter_by(is_verified=False).count()
@@ -220,6 +274,10 @@ class VerificationSystem:
     
     async def cleanup_expired_verifications(self):
         """Clean up expired verification requests"""
+        return await run_in_app_context(self.app, self._expire_verifications)
+    
+    def _expire_verifications(self) -> int:
+        """Flag unverified requests past their expiry as expired"""
         expired_verifications = UserVerification.query.filter(
             UserVerification.expires_at < datetime.utcnow(),
             UserVerification.is_verified == False
@@ -235,6 +293,10 @@ class VerificationSystem:
     
     async def get_user_verification_history(self, user_id: int, limit: int = 10) -> list:
         """Get user's verification history"""
+        return await run_in_app_context(self.app, self._load_verification_history, user_id, limit)
+    
+    def _load_verification_history(self, user_id: int, limit: int) -> list:
+        """Read a user's most recent verifications from the database"""
         verifications = UserVerification.query.filter_by(
             user_id=user_id
         ).order_by(